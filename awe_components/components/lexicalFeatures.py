@@ -473,11 +473,12 @@ class LexicalFeatureDef(object):
         ''' Extensions to allow us to get vectors for tokens in a spacy
             doc or span
         '''
+        mask = content_tag_mask(document.doc)
         return [[token.i, token.vector]
                 for token in document
-                if token.has_vector
-                and not token.is_stop
-                and token.tag_ in content_tags]
+                if mask[token.i]
+                and token.has_vector
+                and not token.is_stop]
 
     def antecedents(self, token):
         ''' Extensions to allow us to get a list of antecedents for
@@ -539,6 +539,7 @@ class SyntaxAndDiscourseFeatDef(object):
         start = 0
         end = 0
         transitionList = Document._.transition_word_profile[3]
+        contentTags = content_tag_mask(Document)
         for item in transitionList:
             entry = newSpanEntry('transitionDistance',
                                  int(item[2]),
@@ -560,18 +561,18 @@ class SyntaxAndDiscourseFeatDef(object):
                         continue
                     if j >= len(Document) or Document[j] is None:
                         continue
-                    if Document[i].has_vector \
-                       and not Document[i].is_stop \
-                       and Document[i].tag_ in content_tags:
+                    if contentTags[i] \
+                       and Document[i].has_vector \
+                       and not Document[i].is_stop:
                         left.append(Document[i].vector)
                     elif Document[i].tag_ in possessive_or_determiner:
                         Resolution = ResolveReference(Document[i], Document)
                         if Resolution is not None and len(Resolution) > 0:
                             left.append(sum([Document[item].vector
                                              for item in Resolution]))
-                    if Document[j].has_vector \
-                       and not Document[j].is_stop \
-                       and Document[j].tag_ in content_tags:
+                    if contentTags[j] \
+                       and Document[j].has_vector \
+                       and not Document[j].is_stop:
                         right.append(Document[j].vector)
                     elif Document[j].tag_ in possessive_or_determiner:
                         Resolution = ResolveReference(Document[j], Document)
@@ -729,6 +730,7 @@ class SyntaxAndDiscourseFeatDef(object):
          local cohesion score more accurate.
         """
         similarities = []
+        contentTags = content_tag_mask(Document)
         for i in range(0, len(Document) - 20):
             entry = newSpanEntry('sliding_window_cohesions',
                                  i,
@@ -742,18 +744,18 @@ class SyntaxAndDiscourseFeatDef(object):
                     continue
                 if Document[i + j + 10] is None:
                     continue
-                if Document[i + j].has_vector \
-                   and not Document[i + j].is_stop \
-                   and Document[i + j].tag_ in content_tags:
+                if contentTags[i + j] \
+                   and Document[i + j].has_vector \
+                   and not Document[i + j].is_stop:
                     left.append(Document[i + j].vector)
                 elif Document[i + j].tag_ in possessive_or_determiner:
                     Resolution = Document[i + j]._.coref_chains.resolve(
                         Document[i + j])
                     if Resolution is not None and len(Resolution) > 0:
                         left.append(sum([item.vector for item in Resolution]))
-                if Document[i + j + 10].has_vector \
-                   and not Document[i + j + 10].is_stop \
-                   and Document[i + j + 10].tag_ in content_tags:
+                if contentTags[i + j + 10] \
+                   and Document[i + j + 10].has_vector \
+                   and not Document[i + j + 10].is_stop:
                     right.append(Document[i + j + 10].vector)
                 elif Document[i + j + 10].tag_ in possessive_or_determiner:
                     Resolution = Document._.coref_chains.resolve(
@@ -6,23 +6,46 @@ This is a bunch of general-purpose functions which might be called by
 different components in this module.
 '''
 
+import os
 import sys
 import logging
 import spacy
-import statistics
 import numpy as np
 import re
 import math
-import pandas as pd
 import json
+import operator
 
 from enum import Enum
+from functools import lru_cache
 from spacy.tokens import Token, Doc, Span
+from spacy.attrs import POS, IS_STOP, HEAD, DEP, TAG
+from spacy.symbols import NOUN, PROPN, VERB, ADJ, ADV, PRON
+from spacy.strings import get_string_id
 from nltk.corpus import wordnet as wn
 from ..errors import *
 from awe_components.wordprobs.wordseqProbClient import *
 
-logging.basicConfig(level="DEBUG")
+# Numba is a dependency, so the tree-walking kernels below are
+# compiled. If it can't be imported (e.g. on a platform it doesn't
+# support yet) they still work, as much slower ordinary Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# Configuring the root logger at import time would turn on debug
+# output for every library in the host application, so we only do
+# it when explicitly requested
+if os.environ.get('AWE_DEBUG'):
+    logging.basicConfig(level=logging.DEBUG)
+
+
+# Integer ids of the parts of speech lexFeat treats as content words
+content_pos_ids = np.array([NOUN, PROPN, VERB, ADJ, ADV], dtype=np.uint64)
 
 
 class FType(Enum):
@@ -40,10 +63,33 @@ def lexFeat(tokens, theProperty):
     Return feature values based on sets of attribute values
     coded as extensions to the spacy token object
     """
-    theSet = [float(t._.get(theProperty)) for t in tokens
-              if t._.get(theProperty) is not None
-              and not t.is_stop
-              and t.pos_ in ['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV']]
+    # Pull the POS and stopword columns out of the document in one
+    # call, so we only touch the extension attribute for content words
+    doc = tokens.doc
+    if isinstance(tokens, Span):
+        start, end = tokens.start, tokens.end
+    else:
+        start, end = 0, len(doc)
+    if end <= start:
+        return []
+    arr = doc.to_array([POS, IS_STOP])[start:end]
+    mask = np.isin(arr[:, 0], content_pos_ids) & (arr[:, 1] == 0)
+    # Resolve the extension's getter once, rather than going through
+    # the underscore accessor for every token
+    extension = Token.get_extension(theProperty)
+    if extension is None:
+        raise AttributeError('Unregistered token extension '
+                             + theProperty)
+    getter = extension[2]
+    theSet = []
+    for i in np.nonzero(mask)[0]:
+        tok = doc[start + int(i)]
+        if getter is not None:
+            value = getter(tok)
+        else:
+            value = tok._.get(theProperty)
+        if value is not None:
+            theSet.append(float(value))
     return theSet
 
 
@@ -51,25 +97,101 @@ def summarize(items, summaryType=FType.STDEV):
     """
      General service function to calculate summary features from raw data
     """
-    filtered = []
-    for item in items:
-        if item is not None:
-            filtered.append(item)
-    if len(filtered) == 0:
+    filtered = np.fromiter((item for item in items if item is not None),
+                           dtype=np.float64)
+    if filtered.size == 0:
         return None
-    if summaryType == FType.MEAN:
-        return statistics.mean(filtered)
-    elif summaryType == FType.MEDIAN:
-        return statistics.median(filtered)
-    elif summaryType == FType.STDEV:
-        if len(items) > 2:
-            return statistics.stdev(filtered)
-        else:
-            return None
-    if summaryType == FType.MAX:
-        return max(filtered)
-    if summaryType == FType.MIN:
-        return min(filtered)
+    if summaryType is FType.MEAN:
+        return float(filtered.mean())
+    elif summaryType is FType.MEDIAN:
+        # np.partition finds the middle element(s) in linear time
+        # without sorting the whole array
+        mid = filtered.size // 2
+        if filtered.size % 2 == 1:
+            return float(np.partition(filtered, mid)[mid])
+        part = np.partition(filtered, [mid - 1, mid])
+        return float((part[mid - 1] + part[mid]) / 2)
+    elif summaryType is FType.STDEV:
+        # the length check has to be on the filtered values, since
+        # None entries don't count toward the sample size
+        return float(filtered.std(ddof=1)) if filtered.size > 2 else None
+    elif summaryType is FType.MAX:
+        return float(filtered.max())
+    elif summaryType is FType.MIN:
+        return float(filtered.min())
+
+
+# Dependency labels and tag prefixes used to assign phrasal
+# categories in print_parse_tree and firstLeftSister
+_NP_DEPS = frozenset(['det',
+                      'poss',
+                      'amod',
+                      'nummod',
+                      'compound',
+                      'nsubj',
+                      'nsubjpass',
+                      'dobj',
+                      'pobj',
+                      'appos',
+                      'attr'])
+
+_VP_DEPS = frozenset(['aux',
+                      'auxpass',
+                      'neg',
+                      'acl',
+                      'relcl',
+                      'advcl',
+                      'ccomp'])
+
+_PP_DEPS = frozenset(['prep', 'agent'])
+
+_COMPLEMENT_CLAUSE_DEPS = frozenset(['ccomp', 'acl', 'csubj'])
+
+_LEFT_VERBAL_DEPS = frozenset(['aux',
+                               'auxpass',
+                               'neg',
+                               'advmod',
+                               'advcl',
+                               'relcl',
+                               'conj'])
+
+_RIGHT_VERBAL_DEPS = frozenset(['aux',
+                                'auxpass',
+                                'neg',
+                                'advmod'])
+
+_LEFT_NOMINAL_DEPS = frozenset(['det',
+                                'poss',
+                                'amod',
+                                'nummod',
+                                'compound',
+                                'nsubj',
+                                'nsubjpass',
+                                'csubj',
+                                'csubjpass',
+                                'dobj',
+                                'pobj',
+                                'attr',
+                                'appos'])
+
+_RIGHT_NOMINAL_DEPS = frozenset(['det',
+                                 'poss',
+                                 'amod',
+                                 'nummod',
+                                 'compound',
+                                 'case'])
+
+_LEFT_ADVERBIAL_DEPS = frozenset(['advmod', 'acomp', 'prep'])
+
+_CLAUSE_DEPS = frozenset(['advcl', 'ccomp', 'acl', 'relcl'])
+
+_BE_TAGS = frozenset(['BEZ', 'BEM', 'BER'])
+
+# str.startswith accepts a tuple, so each of these is a single call
+_AUX_TAG_PREFIXES = ('HV', 'DO')
+_VERB_TAG_PREFIXES = ('V', 'BE', 'DO', 'HV')
+_NOUN_TAG_PREFIXES = ('N', 'TUNIT')
+_ADJ_ADV_TAG_PREFIXES = ('J', 'R')
 
 
 def print_parse_tree(sent):
@@ -80,6 +202,9 @@ def print_parse_tree(sent):
     lastToken = None
     headLoc = 0
     lastHeadLoc = 0
+    depths, heads = _depth_table(sent.doc)
+    sentLen = len(sent)
+    out = []
 
     ########################################################################
     # print each token in the sentence in turn with appropriate annotation #
@@ -87,9 +212,19 @@ def print_parse_tree(sent):
     for token in sent:
 
         # set up some useful variables
-        head = getHead(token)
-        depth = getDepth(token)
-        rightNeighbor = getRight(sent, token.i)
+        head = None
+        if heads[token.i] != token.i:
+            head = sent.doc[heads[token.i]]
+        head_dep = head.dep_ if head is not None else None
+        head_tag = head.tag_ if head is not None else ''
+        head_i = head.i if head is not None else -1
+        depth = depths[token.i]
+        tok_dep = token.dep_
+        tok_tag = token.tag_
+        # getRight, with the sentence length hoisted out of the loop
+        rightNeighbor = None
+        if token.i + 1 < sentLen:
+            rightNeighbor = sent[token.i + 1]
 
         # the actual depth we want to indent, as opposed to depth
         # in the parse tree
@@ -101,36 +236,33 @@ def print_parse_tree(sent):
         cat = ''
 
         # special case -- punctuation
-        if token.dep_ == 'advmod' \
+        if tok_dep == 'advmod' \
            and rightNeighbor is not None \
            and rightNeighbor.dep_ == 'punct':
-            if token.tag_.lower().startswith('R'):
+            if tok_tag.lower().startswith('R'):
                 cat = 'RB'
             else:
                 cat = 'AP'
 
         # special case -- gerunds
-        elif (token.dep_ == 'xcomp'
-              and token.tag_ == 'vbg'):
+        elif (tok_dep == 'xcomp'
+              and tok_tag == 'vbg'):
             cat = 'SG'
 
         # special case -- auxiliaries at depth zero in the parse tree
         elif (depth == 0
-              and (token.tag_ == 'BEZ'
-                   or token.tag_ == 'BEM'
-                   or token.tag_ == 'BER'
-                   or token.tag_.startswith('HV')
-                   or token.tag_.startswith('DO'))):
+              and (tok_tag in _BE_TAGS
+                   or tok_tag.startswith(_AUX_TAG_PREFIXES))):
             cat = 'VP'
 
         # main branch of logic. The firstLeftsister function
         # helps us find the leftmost member of a np, vp, or
         # pp etc. span
         elif firstLeftSister(token, lastToken):
-            if token.tag_ == 'VBG' and \
-               token.dep_ == 'csubj':
+            if tok_tag == 'VBG' and \
+               tok_dep == 'csubj':
                 cat = 'SG'  # gerund
-            elif token.tag_ == 'WRB':  # wh adverbs
+            elif tok_tag == 'WRB':  # wh adverbs
                 if head is not None:
                     for child in head.children:
                         if child.tag_ == 'TO':
@@ -142,177 +274,206 @@ def print_parse_tree(sent):
                 else:
                     cat = 'SB'
                     # subordinate clause with wh adverb
-            elif (token.tag_ == 'TO'
-                  and head is not None
-                  and head.dep_ == 'xcomp'):
+            elif (tok_tag == 'TO'
+                  and head_dep == 'xcomp'):
                 cat = 'SI'  # infinitive clause
-            elif (token.dep_ == 'mark'
-                  and head is not None
-                  and (head.dep_ == 'advcl')):
+            elif (tok_dep == 'mark'
+                  and head_dep == 'advcl'):
                 cat = 'SB\tCOMP'  # adverbial subordinate clause
-            elif (token.dep_ == 'mark'
-                  and head is not None
-                  and (head.dep_ == 'ccomp'
-                       or head.dep_ == 'acl'
-                       or head.dep_ == 'csubj')):
+            elif (tok_dep == 'mark'
+                  and head_dep in _COMPLEMENT_CLAUSE_DEPS):
                 cat = 'SC\tCOMP'   # complement clause
-            elif (token.dep_ == 'mark'
-                  and head is not None
-                  and head.dep_ == 'relcl'):
+            elif (tok_dep == 'mark'
+                  and head_dep == 'relcl'):
                 cat = 'SR\tCOMP'   # relative clause with that
-            elif token.tag_ == 'WDT':
+            elif tok_tag == 'WDT':
                 cat = 'SR\tNP'  # relative clause with wh determiner
-            elif token.tag_ == 'WPS':
+            elif tok_tag == 'WPS':
                 cat = 'SR\tNP'  # relative clause with wh pronoun
-            elif (token.tag_.startswith('V')
-                  and token.dep_ == 'conj'
-                  and head is not None
-                  and head.dep_ == 'advcl'):
+            elif (tok_tag.startswith('V')
+                  and tok_dep == 'conj'
+                  and head_dep == 'advcl'):
                 cat = 'SB'
                 # adverbial subordinate clause
                 # in compound structure
-            elif (token.tag_.startswith(' ')
-                  and token.dep_ == 'conj'
-                  and head is not None
-                  and head.dep_ == 'ccomp'):
+            elif (tok_tag.startswith(' ')
+                  and tok_dep == 'conj'
+                  and head_dep == 'ccomp'):
                 cat = 'SC'   # complement clause in compound structure
-            elif (token.tag_.startswith('V')
-                  and token.dep_ == 'conj'
-                  and head is not None
-                  and head.dep_ == 'acl'):
+            elif (tok_tag.startswith('V')
+                  and tok_dep == 'conj'
+                  and head_dep == 'acl'):
                 cat = 'SC'  # compound clause in compound structure
-            elif (token.tag_.startswith('V')
-                  and token.dep_ == 'conj'
-                  and head is not None
-                  and head.dep_ == 'relcl'):
+            elif (tok_tag.startswith('V')
+                  and tok_dep == 'conj'
+                  and head_dep == 'relcl'):
                 cat = 'SR'  # relative clause
-            elif (token.tag_.startswith('V')
-                  and token.dep_ == 'conj'
-                  and head is not None
-                  and head.dep_ == 'xcomp'):
+            elif (tok_tag.startswith('V')
+                  and tok_dep == 'conj'
+                  and head_dep == 'xcomp'):
                 cat = 'SJ'  # conjoined main clause or VP
-            elif (token.tag_ == 'CC'
+            elif (tok_tag == 'CC'
                   and head is not None
                   and isRoot(head)):
                 cat = 'SJ'  # conjoined main clause or VP
-            elif token.tag_ == 'CC':
+            elif tok_tag == 'CC':
                 cat = 'CC'  # coordinating conjunction
-            elif (token.dep_ == 'prep'
-                  or token.dep_ == 'agent'):
+            elif tok_dep in _PP_DEPS:
                 cat = 'PP'  # prepositional phrase
-            elif (token.dep_ == 'acomp'
-                  or (token.dep_ == 'neg'
-                      and head is not None
-                      and (head.tag_.startswith('J')
-                           or head.tag_.startswith('R')))
-                  or (token.dep_ == 'advmod'
+            elif (tok_dep == 'acomp'
+                  or (tok_dep == 'neg'
+                      and head_tag.startswith(_ADJ_ADV_TAG_PREFIXES))
+                  or (tok_dep == 'advmod'
                       and (head is not None
-                           and head.dep_ != 'amod'
-                           and (head.i < token.i
-                                or head.tag_.startswith('R')
-                                or head.tag_.startswith('J'))))):
-                if (token.tag_.lower().startswith('R')):
+                           and head_dep != 'amod'
+                           and (head_i < token.i
+                                or head_tag.startswith(
+                                    _ADJ_ADV_TAG_PREFIXES))))):
+                if (tok_tag.lower().startswith('R')):
                     cat = 'RB'  # adverb or adverb phrase
                 else:
                     cat = 'AP'  # adjective phrase
-            elif (token.dep_ == 'det'
-                  or (token.dep_ == 'neg'
-                      and head is not None
-                      and head.dep_ == 'det')
-                  or token.dep_ == 'poss'
-                  or token.dep_ == 'amod'
-                  or token.dep_ == 'nummod'
-                  or token.dep_ == 'compound'
-                  or token.dep_ == 'nsubj'
-                  or token.dep_ == 'nsubjpass'
-                  or token.dep_ == 'dobj'
-                  or token.dep_ == 'pobj'
-                  or token.dep_ == 'appos'
-                  or token.dep_ == 'attr'
-                  or token.tag_.startswith('N')
-                  or token.tag_.startswith('TUNIT')):
+            elif (tok_dep in _NP_DEPS
+                  or (tok_dep == 'neg'
+                      and head_dep == 'det')
+                  or tok_tag.startswith(_NOUN_TAG_PREFIXES)):
                 cat = 'NP'  # noun phrase
             elif ((depth == 0
                    and not hasLeftChildren(token))
-                  or token.dep_ == 'aux'
-                  or token.dep_ == 'auxpass'
-                  or token.dep_ == 'neg'
-                  or (token.dep_ == 'advmod'
-                      and token.i < head.i)
-                  or token.dep == 'acl'
-                  or token.dep_ == 'relcl'
-                  or token.dep_ == 'advcl'
-                  or token.dep_ == 'ccomp'
-                  or token.tag_.startswith('V')
-                  or token.tag_.startswith('BE')
-                  or token.tag_.startswith('DO')
-                  or token.tag_.startswith('HV')):
+                  or tok_dep in _VP_DEPS
+                  or (tok_dep == 'advmod'
+                      and token.i < head_i)
+                  or tok_tag.startswith(_VERB_TAG_PREFIXES)):
                 cat = 'VP'  # verb phrase
 
         headLoc -= 1
-        header = '\t'
 
         ################################################################
         # Set up the header element that captures category information #
         # and depth                                                    #
         ################################################################
 
-        # mark the start of the sentence
-        if isLeftEdge(token, sent):
-            header += 'S'
+        # mark the start of the sentence, then add tabs to capture the
+        # degree of indent we are setting for this word, and put the
+        # category of the word as the first item in the indent
+        header = '\t' \
+            + ('S' if isLeftEdge(token, sent) else '') \
+            + '\t' * max(usedDepth + 1, 0) \
+            + cat
 
-        # add tabs to capture the degree of indent we are setting for
-        # this word
-        while usedDepth >= 0:
-            header += '\t'
-            usedDepth -= 1
-        # put the category of the word as the first item in the indent
-        header += cat
-
-        headLoc = -1
-        if head is not None:
-            headLoc = head.i
+        headLoc = head_i
 
         ##################################################################
-        # format the whole line and print it. Index of word plus header  #
+        # format the whole line and queue it. Index of word plus header  #
         # information including word category, followed by the token's   #
         # tag and text, its lemma in parentheses, followed by the de-    #
         # pendency label and the index of the word the dependency points #
         # to                                                             #
         ##################################################################
         anteced = ResolveReference(token, sent)
-        line = str(token.i) \
-            + header \
-            + "\t|" \
-            + token.tag_ \
-            + " " \
-            + token.text + \
-            " (" \
-            + token.lemma_.replace('\n', 'para') \
-            + " " \
-            + str(anteced) \
-            + ")" \
-            + " " \
-            + token.dep_ + \
-            ":" \
-            + str(headLoc)
-
-        line = line.expandtabs(6)
-        print(line,
-              'ant:', token._.antecedents,
-              'gsubj:', token._.governing_subject,
-              'vp:', token._.vwp_perspective,
-              'sm:', token._.vwp_evaluation_)
+        lemma = token.lemma_.replace('\n', 'para')
+        out.append(f"{token.i}{header}\t|{token.tag_} {token.text} "
+                   f"({lemma} {anteced}) {token.dep_}:{headLoc}"
+                   f" ant: {token._.antecedents}"
+                   f" gsubj: {token._.governing_subject}"
+                   f" vp: {token._.vwp_perspective}"
+                   f" sm: {token._.vwp_evaluation_}")
 
         lastToken = token
         if head is not None:
-            lastHeadLoc = head.i
+            lastHeadLoc = head_i
+
+    # emit the whole sentence with a single write
+    if len(out) > 0:
+        sys.stdout.write("\n".join(out).expandtabs(6) + "\n")
+
+
+def _head_array(doc: Doc):
+    """
+     This function returns the absolute index of the head of every
+     token in the document as a NumPy array, with roots pointing to
+     themselves. doc.to_array gives heads as offsets relative to each
+     token, so we add the token positions back in. The array is cached
+     in doc.user_data.
+    """
+    heads = doc.user_data.get('_awe_head_array')
+    if heads is not None and len(heads) == len(doc):
+        return heads
+    heads = doc.to_array(HEAD).astype(np.int64) \
+        + np.arange(len(doc), dtype=np.int64)
+    doc.user_data['_awe_head_array'] = heads
+    return heads
+
+
+def _token_head_array(doc: Doc):
+    """
+     This function returns the head index of every token the way
+     Token.head reports it. That differs from _head_array (which
+     follows the same links as tok.ancestors and tok.children) only
+     for tokens without a dependency label, which Token.head treats
+     as their own heads. The array is cached in doc.user_data.
+    """
+    heads = doc.user_data.get('_awe_token_heads')
+    if heads is not None and len(heads) == len(doc):
+        return heads
+    heads = np.where(doc.to_array(DEP) == 0,
+                     np.arange(len(doc), dtype=np.int64),
+                     _head_array(doc))
+    doc.user_data['_awe_token_heads'] = heads
+    return heads
+
+
+@njit(cache=True)
+def _depths_from_heads(heads):
+    """
+     Compute the depth of every node of a tree given as an array of
+     head indices (roots point to themselves), memoizing the depths
+     of nodes already visited.
+    """
+    n = heads.shape[0]
+    depths = np.full(n, -1, dtype=np.int64)
+    path = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        length = 0
+        j = i
+        while depths[j] < 0 and heads[j] != j:
+            path[length] = j
+            length += 1
+            j = heads[j]
+        if depths[j] < 0:
+            depths[j] = 0
+        depth = depths[j]
+        for k in range(length - 1, -1, -1):
+            depth += 1
+            depths[path[k]] = depth
+    return depths
+
+
+def _depth_table(doc: Doc):
+    """
+     This function builds lookup tables mapping each token index
+     to its depth in the spaCY dependency tree and to the index
+     of its head (roots are their own heads). The tables are built
+     from the head array in a single memoized pass over the document
+     and cached in doc.user_data, so repeated depth and head queries
+     do not have to walk tok.ancestors from scratch.
+    """
+    table = doc.user_data.get('_awe_depth_table')
+    if table is not None and len(table[0]) == len(doc):
+        return table
+    harr = _head_array(doc)
+    depths = _depths_from_heads(harr).tolist()
+    heads = harr.tolist()
+    table = (depths, heads)
+    doc.user_data['_awe_depth_table'] = table
+    return table
 
 
 def getHead(tok: Token):
     if tok is not None and tok is not bool:
-        for anc in tok.ancestors:
-            return anc
+        headLoc = _depth_table(tok.doc)[1][tok.i]
+        if headLoc != tok.i:
+            return tok.doc[headLoc]
     return None
 
 
@@ -321,11 +482,9 @@ def getDepth(tok: Token):
      This function calculates the depth of the current word
      in the spaCY dependency tree
     """
-    depth = 0
-    if tok is not None:
-        for anc in tok.ancestors:
-            depth += 1
-    return depth
+    if tok is None:
+        return 0
+    return _depth_table(tok.doc)[0][tok.i]
 
 
 def getAdjustedDepth(tok: Token):
@@ -333,10 +492,14 @@ def getAdjustedDepth(tok: Token):
      This function adjusts the depth of the word node to the
      depth we want to display in the output
     """
-    depth = getDepth(tok)
+    depths, heads = _depth_table(tok.doc)
+    depth = depths[tok.i]
     adjustment = 0
     if tok is not None:
-        for anc in tok.ancestors:
+        loc = tok.i
+        while heads[loc] != loc:
+            loc = heads[loc]
+            anc = tok.doc[loc]
             # clausal subjects need to be embedded one deeper
             # than other elements left of the head, but
             # otherwise we decrease indent of elements left of
@@ -348,17 +511,13 @@ def getAdjustedDepth(tok: Token):
                 adjustment += 1
             # clauses should be indented one level deeper
             # than the dependency tree suggests
-            if tok.dep_ == 'advcl' \
-               or tok.dep_ == 'ccomp' \
-               or tok.dep_ == 'acl' \
-               or tok.dep_ == 'relcl':
+            if tok.dep_ in _CLAUSE_DEPS:
                 adjustment -= 1
-            if anc.dep_ == 'advcl' \
-               or anc.dep_ == 'ccomp'\
-               or anc.dep_ == 'acl' \
-               or anc.dep_ == 'relcl':
+            if anc.dep_ in _CLAUSE_DEPS:
                 adjustment -= 1
-    head = getHead(tok)
+    head = None
+    if heads[tok.i] != tok.i:
+        head = tok.doc[heads[tok.i]]
     if tok.dep_ == 'mark' \
        and head is not None \
        and head.dep_ == 'csubj':
@@ -371,7 +530,7 @@ def getRight(sentence, loc):
      This function returns the word immediately to the
      right of the input token
     """
-    if loc + 1 < sentence.__len__():
+    if loc + 1 < len(sentence):
         return sentence[loc + 1]
     return None
 
@@ -385,9 +544,18 @@ def firstLeftSister(tokenA: Token, tokenB: Token):
      a phrase, and that each type of phrase uses a limited
      number of dependencies for left sisters
     """
-    depth = getDepth(tokenA)
-    depthB = getDepth(tokenB)
-    head = getHead(tokenA)
+    depth = 0
+    depthB = 0
+    head = None
+    if tokenA is not None:
+        depths, heads = _depth_table(tokenA.doc)
+        depth = depths[tokenA.i]
+        if tokenB is not None:
+            depthB = depths[tokenB.i]
+        if heads[tokenA.i] != tokenA.i:
+            head = tokenA.doc[heads[tokenA.i]]
+    elif tokenB is not None:
+        depthB = getDepth(tokenB)
     if abs(depth - depthB) > 1 \
        and (tokenB is None
             or tokenB.dep_ != 'case'
@@ -398,73 +566,42 @@ def firstLeftSister(tokenA: Token, tokenB: Token):
         return True
     elif (tokenA is not None
           and tokenB is not None):
-        if tokenA.dep_ == 'prep' \
-           and tokenB.tag_.startswith('R') \
+        depA = tokenA.dep_
+        tagA = tokenA.tag_
+        depB = tokenB.dep_
+        tagB = tokenB.tag_
+        if depA == 'prep' \
+           and tagB.startswith('R') \
            and tokenB.lower_.endswith('ly'):
             return True
-        if tokenA.dep_ == 'advmod' \
-           and tokenA.tag_.startswith('R') \
+        if depA == 'advmod' \
+           and tagA.startswith('R') \
            and head.tag_.startswith('V') \
            and head.i == tokenA.i - 1:
             return True
-        if (tokenA.dep_ == 'aux'
-            or tokenA.dep_ == 'auxpass'
-            or tokenA.dep_ == 'neg'
-            or tokenA.dep_ == 'advmod'
-            or tokenA.dep_ == 'advcl'
-            or tokenA.dep_ == 'relcl'
-            or tokenA.dep_ == 'conj'
-            or tokenA.tag_.startswith('V')
-            or tokenA.tag_.startswith('BE')
-            or tokenA.tag_.startswith('DO')
-            or tokenA.tag_.startswith('HV')) \
-           and (tokenB.dep_ == 'aux'
-                or tokenB.dep_ == 'auxpass'
-                or tokenB.dep_ == 'neg'
-                or tokenB.dep_ == 'advmod'
-                or (tokenB.dep_ == 'punct'
+        if (depA in _LEFT_VERBAL_DEPS
+            or tagA.startswith(_VERB_TAG_PREFIXES)) \
+           and (depB in _RIGHT_VERBAL_DEPS
+                or (depB == 'punct'
                     and tokenA in tokenB.ancestors)
-                or tokenB.tag_.startswith('BE')
-                or tokenB.tag_.startswith('DO')
-                or tokenB.tag_.startswith('HV')
-                or tokenB.tag_.startswith('V')):
+                or tagB.startswith(_VERB_TAG_PREFIXES)):
             return False
-        if (tokenA.dep_ == 'det'
-            or tokenA.dep_ == 'poss'
-            or tokenA.dep_ == 'amod'
-            or tokenA.dep_ == 'nummod'
-            or tokenA.dep_ == 'compound'
-            or tokenA.dep_ == 'nsubj'
-            or tokenA.dep_ == 'nsubjpass'
-            or tokenA.dep_ == 'csubj'
-            or tokenA.dep_ == 'csubjpass'
-            or tokenA.dep_ == 'dobj'
-            or tokenA.dep_ == 'pobj'
-            or tokenA.dep_ == 'attr'
-            or tokenA.dep_ == 'appos'
-            or (tokenA.dep_ == 'neg'
-                and getHead(tokenA) is not None
-                and getHead(tokenA).dep_ == 'det')) \
-           and (tokenB.dep_ == 'det'
-                or tokenB.dep_ == 'poss'
-                or tokenB.dep_ == 'amod'
-                or tokenB.dep_ == 'nummod'
-                or tokenB.dep_ == 'compound'
-                or tokenB.dep_ == 'case'
-                or (tokenB.dep_ == 'punct'
+        if (depA in _LEFT_NOMINAL_DEPS
+            or (depA == 'neg'
+                and head is not None
+                and head.dep_ == 'det')) \
+           and (depB in _RIGHT_NOMINAL_DEPS
+                or (depB == 'punct'
                     and tokenA in tokenB.ancestors)
-                or (tokenB.dep_ == 'neg'
-                    and getHead(tokenA) is not None
+                or (depB == 'neg'
+                    and head is not None
                     and getHead(tokenB).dep_ == 'det')):
             return False
-        if (tokenA.dep_ == 'advmod'
-            or tokenA.dep_ == 'acomp'
-            or tokenA.dep_ == 'prep'
-            or (tokenA.dep_ == 'neg'
+        if (depA in _LEFT_ADVERBIAL_DEPS
+            or (depA == 'neg'
                 and head is not None
-                and (head.tag_.startswith('J')
-                     or head.tag_.startswith('R')))) \
-           and (tokenB.dep_ == 'advmod'):
+                and head.tag_.startswith(_ADJ_ADV_TAG_PREFIXES))) \
+           and (depB == 'advmod'):
             return False
     return True
 
@@ -474,12 +611,11 @@ def isLeftEdge(token: Token, sentence: Span):
      This function indicates whether a token is the
      leftmost element in a sentence
     """
-    for tok in sentence:
-        if tok == token:
-            return True
-        else:
-            break
-    return False
+    if len(sentence) == 0:
+        return False
+    if isinstance(sentence, Span):
+        return token.i == sentence.start
+    return token.i == 0
 
 
 def hasLeftChildren(tok: Token):
@@ -487,10 +623,21 @@ def hasLeftChildren(tok: Token):
      This function indicates whether the token input to the
      function has any children to its left
     """
-    for child in tok.children:
-        if child.i < tok.i:
-            return True
-    return False
+    return tok.n_lefts > 0
+
+
+def _left_sister_flags(doc: Doc):
+    """
+     This function returns the per-document array recording, for
+     each adjacent pair of tokens (i, i+1), whether firstLeftSister
+     holds. Entries are filled in lazily and are -1 until computed.
+    """
+    flags = doc.user_data.get('_awe_left_sister')
+    if flags is not None and len(flags) == max(len(doc) - 1, 0):
+        return flags
+    flags = np.full(max(len(doc) - 1, 0), -1, dtype=np.int8)
+    doc.user_data['_awe_left_sister'] = flags
+    return flags
 
 
 def leftSisterSpan(doc, start, end):
@@ -498,54 +645,50 @@ def leftSisterSpan(doc, start, end):
      This function indicates that a sequence is the complete
      span from the first left dependent to the head
     """
-    if end > start:
+    if end <= start:
         return False
-    lastToken = None
-    while start < end:
-        if lastToken is not None:
-            if not firstLeftSister(doc[start], doc[start + 1]):
-                return False
-        start += 1
-    return True
+    flags = _left_sister_flags(doc)
+    window = flags[start:end - 1]
+    for i in np.flatnonzero(window < 0):
+        loc = start + int(i)
+        window[i] = firstLeftSister(doc[loc], doc[loc + 1])
+    return bool(window.all())
 
 
 def getFirstChild(token: Token):
-    for child in token.children:
-        return child
-    else:
-        return None
+    return next(token.children, None)
 
 
-subject_or_object_nom = ['nsubj',
-                         'nsubjpass',
-                         'dobj']
+subject_or_object_nom = frozenset(['nsubj',
+                                   'nsubjpass',
+                                   'dobj'])
 
 underlying_object_dependencies = ['dobj', 'nsubjpass']
 
-clausal_complements = ['csubj',
-                       'csubjpass',
-                       'ccomp',
-                       'xcomp',
-                       'pcomp',
-                       'acl',
-                       'oprd']
-
-complements = ['csubj',
-               'ccomp',
-               'nsubj',
-               'nsubjpass',
-               'dobj',
-               'xcomp',
-               'acl',
-               'oprd',
-               'attr',
-               'acomp']
+clausal_complements = frozenset(['csubj',
+                                 'csubjpass',
+                                 'ccomp',
+                                 'xcomp',
+                                 'pcomp',
+                                 'acl',
+                                 'oprd'])
+
+complements = frozenset(['csubj',
+                         'ccomp',
+                         'nsubj',
+                         'nsubjpass',
+                         'dobj',
+                         'xcomp',
+                         'acl',
+                         'oprd',
+                         'attr',
+                         'acomp'])
 
 clausal_modifier_dependencies = ['relcl',
                                  'advcl',
                                  'prep']
 
-adjectival_predicates = ['attr', 'oprd', 'acomp', 'amod']
+adjectival_predicates = frozenset(['attr', 'oprd', 'acomp', 'amod'])
 
 adjectival_mod_dependencies = ['amod', 'nmod', 'prep', 'acl']
 
@@ -577,40 +720,36 @@ general_complements_and_modifiers = ['acomp',
                                     'parataxis',
                                     'acl']
 
+_BARE_INFINITIVE_LEMMAS = frozenset(["make",
+                                     "have",
+                                     "help",
+                                     "let",
+                                     "go",
+                                     "bid",
+                                     "feel",
+                                     "hear",
+                                     "see",
+                                     "watch",
+                                     "notice",
+                                     "observe",
+                                     "overhear",
+                                     "monitor",
+                                     "perceive",
+                                     "consider",
+                                     "proclaim",
+                                     "declare"])
+
+
 def takesBareInfinitive(item: Token):
     """
      This function exists because spaCY uses the same dependency
      configuration for tensed clauses and untensed clauses (so-called
      "small clauses"). We need to know when something is a small clause
      so we know how to indent the tree properly, among other things.
-     The list in this function may not be complete -- the correct
+     The list of verbs may not be complete -- the correct
      list should be reviewed.
     """
-    if item is None:
-        return False
-    if item.lemma_ in ["make",
-                       "have",
-                       "help",
-                       "let",
-                       "go",
-                       "bid",
-                       "feel",
-                       "hear",
-                       "see",
-                       "watch",
-                       "notice",
-                       "observe",
-                       "overhear",
-                       "monitor",
-                       "help",
-                       "observe",
-                       "perceive",
-                       "notice",
-                       "consider",
-                       "proclaim",
-                       "declare"]:
-        return True
-    return False
+    return item is not None and item.lemma_ in _BARE_INFINITIVE_LEMMAS
 
 be_verbs = ['am',
             'are',
@@ -621,6 +760,23 @@ be_verbs = ['am',
             'being',
             'been']
 
+_TENSED_SUBJECT_DEPS = frozenset(['nsubj',
+                                  'nsubjpass',
+                                  'csubj',
+                                  'csubjpass',
+                                  'expl'])
+
+_TENSED_AUX_LEMMAS = frozenset(['am',
+                                'are',
+                                'is',
+                                'was',
+                                'were',
+                                'have',
+                                'has',
+                                'do',
+                                'does'])
+
+
 def tensed_clause(tok: Token):
     """
      This function calculates whether a token is the head of a tensed clause.
@@ -637,7 +793,7 @@ def tensed_clause(tok: Token):
     head = getHead(tok)
     for child in tok.children:
         # tensed clauses obligatorily contain subjects
-        if child.dep_ in ['nsubj', 'nsubjpass', 'csubj', 'csubjpass', 'expl']:
+        if child.dep_ in _TENSED_SUBJECT_DEPS:
             hasSubj = True
         # infinitives are never tensed clauses
         if child.dep_ == 'aux' and child.tag_ == 'TO':
@@ -648,21 +804,13 @@ def tensed_clause(tok: Token):
         # which may be an auxiliary
         if child.dep_ == 'aux' \
            and (child.tag_ == 'MD'
-                or child.lemma_ in ['am',
-                                    'are',
-                                    'is',
-                                    'was',
-                                    'were',
-                                    'have',
-                                    'has',
-                                    'do',
-                                    'does']
+                or child.lemma_ in _TENSED_AUX_LEMMAS
                 or child.tag_ == 'BEZ'
                 or child.tag_ == 'BEM'
                 or child.tag_ == 'BER'
                 or child.tag_.startswith('HV')
                 or child.tag_.startswith('DO')
-                or 'Tense=' in str(child.morph)):
+                or len(child.morph.get('Tense')) > 0):
             hasTenseMarker = True
 
     # if we're at root level, we still have to check if we have
@@ -673,7 +821,7 @@ def tensed_clause(tok: Token):
        or tok.tag_ == 'BER' \
        or tok.tag_.startswith('HV') \
        or tok.tag_.startswith('DO') \
-       or 'Tense=' in str(tok.morph):
+       or len(tok.morph.get('Tense')) > 0:
         hasTenseMarker = True
 
     if infinitive:
@@ -729,7 +877,7 @@ def past_tense_verb(tok: Token):
     This function checks the space morphology feature
     to determine if a verb is in the past tense.
     """
-    if 'Tense=Past' in str(tok.morph):
+    if 'Past' in tok.morph.get('Tense'):
         for child in tok.children:
             if child.lemma_ == 'be':
                 if child.lower_ not in ['was', 'were']:
@@ -739,157 +887,280 @@ def past_tense_verb(tok: Token):
         return False
 
 
+def _past_tense_flags(doc: Doc):
+    """
+     This function evaluates past_tense_verb for every token in
+     the document at once. The result is a boolean array cached in
+     doc.user_data, so the tense scope functions can look the answer
+     up by token index instead of re-checking the morphology and
+     children of each head they pass through.
+    """
+    flags = doc.user_data.get('_awe_past_tense')
+    if flags is not None and len(flags) == len(doc):
+        return flags
+    flags = np.fromiter(('Past' in t.morph.get('Tense') for t in doc),
+                        dtype=bool,
+                        count=len(doc))
+    for i in np.flatnonzero(flags):
+        for child in doc[int(i)].children:
+            if child.lemma_ == 'be' \
+               and child.lower_ not in ['was', 'were']:
+                flags[i] = False
+                break
+    doc.user_data['_awe_past_tense'] = flags
+    return flags
+
+
+# Auxiliaries that mark a clause as past, present or modal. The
+# first two sets decide the tense of the clause a word belongs to;
+# the others are checked for anywhere in the subtree of a tensed head.
+_SIMPLE_PAST_AUX_SET = frozenset(['was', 'were', 'did', '\'d', 'had'])
+
+_PRESENT_AUX_SET = frozenset(['do',
+                              'does',
+                              'has',
+                              'will',
+                              'can',
+                              'shall',
+                              'may',
+                              'must',
+                              'am',
+                              'are',
+                              'is'])
+
+_CLAUSE_PAST_AUX_SET = frozenset(['did',
+                                  'had',
+                                  'was',
+                                  'were',
+                                  'could',
+                                  'would',
+                                  '\'d'])
+
+# the check at the root of the clause also accepts the curly
+# apostrophe form of 'd
+_PAST_AUX_SET = _CLAUSE_PAST_AUX_SET | frozenset(['’d'])
+
+_MODAL_AUX_SET = frozenset(['will',
+                            'would',
+                            'shall',
+                            'should',
+                            'can',
+                            'could',
+                            'may',
+                            'might',
+                            'must'])
+
+_NO_AUX = frozenset()
+
+
+def _aux_index(doc: Doc):
+    """
+     This function builds (and caches in doc.user_data) an index
+     from each token to the lowercased auxiliaries in its subtree,
+     plus the first auxiliary from the simple past or present sets
+     that occurs in that subtree. This lets the tense scope functions
+     answer 'is there such an auxiliary under this head' with a
+     dictionary lookup rather than a walk over tok.subtree. (The
+     auxiliaries are stored as tuples, since msgpack can't serialize
+     sets and doc.user_data goes along with Doc.to_bytes.)
+    """
+    cached = doc.user_data.get('_awe_aux_index')
+    if cached is not None and cached[0] == len(doc):
+        return cached[1], cached[2]
+    heads = _depth_table(doc)[1]
+    auxes = {}
+    firstTenseAux = {}
+    for item in doc:
+        if item.dep_ != 'aux':
+            continue
+        lower = item.lower_
+        tenseAux = lower in _SIMPLE_PAST_AUX_SET \
+            or lower in _PRESENT_AUX_SET
+        loc = item.i
+        while True:
+            auxes.setdefault(loc, set()).add(lower)
+            # we visit tokens in document order, so the first
+            # value stored is the first one in subtree order
+            if tenseAux:
+                firstTenseAux.setdefault(loc, lower)
+            if heads[loc] == loc:
+                break
+            loc = heads[loc]
+    auxes = {loc: tuple(sorted(names)) for loc, names in auxes.items()}
+    doc.user_data['_awe_aux_index'] = (len(doc), auxes, firstTenseAux)
+    return auxes, firstTenseAux
+
+
+def _root_flags(doc: Doc):
+    """
+     This function evaluates isRoot for every token in the document,
+     inlined over the head and dependency arrays: a token is a root if
+     it is its own head, is labeled ROOT, or is conjoined to a token
+     that is its own head.
+    """
+    heads = _token_head_array(doc)
+    deps = doc.to_array(DEP)
+    selfHeaded = heads == np.arange(len(doc))
+    return selfHeaded \
+        | (deps == doc.vocab.strings['ROOT']) \
+        | ((deps == doc.vocab.strings['conj']) & selfHeaded[heads])
+
+
+def _clause_flags(doc: Doc):
+    """
+     This function evaluates isRoot and tensed_clause for every token
+     in the document, caching the two boolean arrays in doc.user_data
+     so the tense scope walk can run over plain arrays.
+    """
+    cached = doc.user_data.get('_awe_clause_flags')
+    if cached is not None and len(cached[0]) == len(doc):
+        return cached
+    roots = _root_flags(doc)
+    tensed = np.fromiter((tensed_clause(t) for t in doc),
+                         dtype=bool,
+                         count=len(doc))
+    doc.user_data['_awe_clause_flags'] = (roots, tensed)
+    return roots, tensed
+
+
+def _newline_flags(doc: Doc):
+    """
+     This function marks the tokens whose text contains a newline,
+     caching the boolean array in doc.user_data.
+    """
+    flags = doc.user_data.get('_awe_newlines')
+    if flags is not None and len(flags) == len(doc):
+        return flags
+    flags = np.fromiter(('\n' in t.text for t in doc),
+                        dtype=bool,
+                        count=len(doc))
+    doc.user_data['_awe_newlines'] = flags
+    return flags
+
+
+def _ensure_doc_caches(doc: Doc):
+    """
+     This function makes sure all the per-document arrays used by
+     the tense scope functions have been built, and returns them as
+     (heads, newlines, pastTense, auxes, firstTenseAux, roots, tensed).
+     Each one is cached in doc.user_data, so after the first call
+     a scope query is just a few array lookups plus the head walk.
+    """
+    auxes, firstTenseAux = _aux_index(doc)
+    roots, tensed = _clause_flags(doc)
+    return (_token_head_array(doc),
+            _newline_flags(doc),
+            _past_tense_flags(doc),
+            auxes,
+            firstTenseAux,
+            roots,
+            tensed)
+
+
+# Possible outcomes of the upward walk in _scope_walk
+_SCOPE_STUCK = 0
+_SCOPE_PAST = 1
+_SCOPE_TENSED = 2
+_SCOPE_ROOT = 3
+
+
+@njit(cache=True)
+def _scope_walk(heads, roots, pastTense, tensed, start):
+    """
+     Climb from token index start toward the root of its clause,
+     stopping at the first head that is a past tense verb or heads
+     a tensed clause. Returns the index where the walk stopped and
+     one of the _SCOPE_* outcome codes.
+    """
+    i = start
+    while not roots[i]:
+        head = heads[i]
+        if pastTense[head]:
+            return head, _SCOPE_PAST
+        elif tensed[head]:
+            return head, _SCOPE_TENSED
+        if head != i:
+            i = head
+        else:
+            return i, _SCOPE_STUCK
+    return i, _SCOPE_ROOT
+
+
 def in_past_tense_scope(tok: Token):
     if tok is None:
         return None
-    if '\n' in tok.text:
+    heads, newlines, pastTense, auxes, firstTenseAux, roots, tensed = \
+        _ensure_doc_caches(tok.doc)
+    if newlines[tok.i]:
         return None
     if tok.lower_ in ['was', 'were']:
         return True
-    for item in tok.subtree:
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['was',
-                               'were',
-                               'did',
-                               '\'d',
-                               'had']:
-            return True
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['do',
-                               'does',
-                               'has',
-                               'will',
-                               'can',
-                               'shall',
-                               'may',
-                               'must',
-                               'am',
-                               'are',
-                               'is']:
-            return False
-    for item in tok.head.subtree:
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['was',
-                               'were',
-                               'did',
-                               '\'d',
-                               'had']:
-            return True
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['do',
-                               'does',
-                               'has',
-                               'will',
-                               'can',
-                               'shall',
-                               'may',
-                               'must',
-                               'am',
-                               'are',
-                               'is']:
-            return False
-    if past_tense_verb(tok):
+    first = firstTenseAux.get(tok.i)
+    if first is None:
+        first = firstTenseAux.get(int(heads[tok.i]))
+    if first is not None:
+        return first in _SIMPLE_PAST_AUX_SET
+    if pastTense[tok.i]:
         return True
-    while not isRoot(tok):
-        if past_tense_verb(tok.head):
-            return True
-        elif tensed_clause(tok.head):
-            for item in tok.head.subtree:
-                if item.dep_ == 'aux' \
-                   and item.lower_ in ['did',
-                                       'had',
-                                       'was',
-                                       'were',
-                                       'could',
-                                       'would',
-                                       '\'d']:
-                    return True
-            return False
-        if tok.head is not None and tok != tok.head:
-            tok = tok.head
-        else:
-            return False
-    for item in tok.head.subtree:
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['did',
-                               'had',
-                               '\'d',
-                               'was',
-                               'were',
-                               'could',
-                               'would',
-                                '’d']:
-            return True
-    if isRoot(tok) and 'VerbForm=Inf' in str(tok.morph):
-        return False
+    stop, outcome = _scope_walk(heads, roots, pastTense, tensed, tok.i)
+    if outcome == _SCOPE_PAST:
+        return True
+    elif outcome == _SCOPE_TENSED:
+        return not _CLAUSE_PAST_AUX_SET.isdisjoint(
+            auxes.get(int(stop), _NO_AUX))
+    elif outcome == _SCOPE_ROOT:
+        return not _PAST_AUX_SET.isdisjoint(
+            auxes.get(int(heads[stop]), _NO_AUX))
     return False
 
 
 def in_modal_scope(tok: Token):
     if tok is None:
         return None
-    if '\n' in tok.text:
+    heads, newlines, pastTense, auxes, _, roots, tensed = \
+        _ensure_doc_caches(tok.doc)
+    if newlines[tok.i]:
         return None
-    if past_tense_verb(tok):
-        return False
-    while not isRoot(tok):
-        if past_tense_verb(tok.head):
-            return False
-        elif tensed_clause(tok.head):
-            for item in tok.head.subtree:
-                if item.dep_ == 'aux' \
-                   and item.lower_ in ['will',
-                                       'would',
-                                       'shall',
-                                       'should',
-                                       'can',
-                                       'could',
-                                       'may',
-                                       'might',
-                                       'must']:
-                    return True
-            return False
-        if tok.head is not None \
-           and tok != tok.head:
-            tok = tok.head
-        else:
-            return False
-    for item in tok.head.subtree:
-        if item.dep_ == 'aux' \
-           and item.lower_ in ['will',
-                               'would',
-                               'shall',
-                               'should',
-                               'can',
-                               'could',
-                               'may',
-                               'might',
-                               'must']:
-            return True
-    if isRoot(tok) and 'VerbForm=Inf' in str(tok.morph):
+    if pastTense[tok.i]:
         return False
+    stop, outcome = _scope_walk(heads, roots, pastTense, tensed, tok.i)
+    if outcome == _SCOPE_TENSED:
+        return not _MODAL_AUX_SET.isdisjoint(
+            auxes.get(int(stop), _NO_AUX))
+    elif outcome == _SCOPE_ROOT:
+        return not _MODAL_AUX_SET.isdisjoint(
+            auxes.get(int(heads[stop]), _NO_AUX))
     return False
 
 
+_NEGATIVE_PREDICATE_LEMMAS = frozenset(['lack',
+                                        'fail',
+                                        'failure',
+                                        'absence',
+                                        'shortage',
+                                        'false',
+                                        'wrong',
+                                        'inaccurate',
+                                        'incorrect'])
+
+
 def negativePredicate(item):
     """
      This function identifies lexical predicates that function as
      equivalent to negation when combined with other elements. This
      list may not be complete -- to double check later.
     """
-    if item.lemma_ in ['lack',
-                       'fail',
-                       'failure',
-                       'absence',
-                       'shortage',
-                       'false',
-                       'wrong',
-                       'inaccurate',
-                       'incorrect']:
+    if item.lemma_ in _NEGATIVE_PREDICATE_LEMMAS:
         return True
     return False
 
 
+_ATTRIBUTE_NOUN_LEMMAS = frozenset(['lack',
+                                    'absence',
+                                    'shortage',
+                                    'abundance'])
+
+
 def isAttributeNoun(item):
     """
      This function identifies nouns that take of complements,
@@ -897,63 +1168,68 @@ def isAttributeNoun(item):
      want to allow complements of these nouns to be in the
      scope of negation.
     """
-    if item.lemma_ in ['lack',
-                       'absence',
-                       'shortage',
-                       'abundance']:
+    if item.lemma_ in _ATTRIBUTE_NOUN_LEMMAS:
         return True
     return False
 
 
+_EMPTY_HEAD_LEMMAS = frozenset(['less',
+                                'more',
+                                'most',
+                                'many',
+                                'few',
+                                'all',
+                                'some',
+                                'none',
+                                'several',
+                                'that',
+                                'those',
+                                'one',
+                                'two',
+                                'three',
+                                'four',
+                                'five',
+                                'six',
+                                'seven',
+                                'eight',
+                                'nine',
+                                'ten',
+                                'part',
+                                'portion',
+                                'rest',
+                                'remnant',
+                                'section',
+                                'segment'])
+
+
 def emptyHeadWord(tok):
-    if tok.lemma in ['less',
-                     'more',
-                     'most',
-                     'many',
-                     'few',
-                     'all',
-                     'some',
-                     'none',
-                     'several',
-                     'that',
-                     'those',
-                     'one',
-                     'two',
-                     'three',
-                     'four',
-                     'five',
-                     'six',
-                     'seven',
-                     'eight',
-                     'nine',
-                     'ten',
-                     'part',
-                     'portion',
-                     'rest',
-                     'remnant',
-                     'section',
-                     'segment']:
+    if tok.lemma_ in _EMPTY_HEAD_LEMMAS:
         return True
     if tok.tag_ == 'CD':
         return True
 
 
+_COMP_WORDS = ('than', 'of')
+
+_LIGHT_VERBS = ("have",
+                "make",
+                "give",
+                "present",
+                "take",
+                "adopt",
+                "accept",
+                "defend",
+                "support",
+                "maintain",
+                "express")
+
+
 def getCompWords():
-    return ['than', 'of']
+    return _COMP_WORDS
 
 
 def getLightVerbs():
-    return ["have",
-            "make",
-            "give",
-            "present",
-            "take",
-            "adopt",
-            "accept",
-            "defend",
-            "support",
-            "maintain",
-            "express"]
+    return _LIGHT_VERBS
 
 
 def getRoots(doc):
@@ -967,17 +1243,52 @@ def getRoots(doc):
     return roots
 
 
+@njit(cache=True)
+def _climb_to_stops(heads, stops):
+    """
+     For every node of a tree given as an array of head indices,
+     find the first node at or above it that is flagged in stops,
+     memoizing the answers for nodes already visited.
+    """
+    n = heads.shape[0]
+    found = np.full(n, -1, dtype=np.int64)
+    path = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        length = 0
+        j = i
+        while found[j] < 0 and not stops[j]:
+            path[length] = j
+            length += 1
+            j = heads[j]
+        if found[j] < 0:
+            found[j] = j
+        for k in range(length):
+            found[path[k]] = found[j]
+    return found
+
+
+def _sentence_roots(doc: Doc):
+    """
+     This function finds the getRoot answer for every token in the
+     document in one pass, caching the list of indices in
+     doc.user_data.
+    """
+    roots = doc.user_data.get('_awe_sentence_roots')
+    if roots is not None and len(roots) == len(doc):
+        return roots
+    # the climb stops at a root, or at a token with no dependency
+    # label (which is its own head anyway)
+    stops = _root_flags(doc) | (doc.to_array(DEP) == 0)
+    roots = _climb_to_stops(_token_head_array(doc), stops).tolist()
+    doc.user_data['_awe_sentence_roots'] = roots
+    return roots
+
+
 def getRoot(token):
     """
     This function returns the sentence root for the current token.
     """
-    if isRoot(token):
-        return token
-    if token.dep_ == '':
-        return token
-    if token.head is None:
-        return token
-    return getRoot(token.head)
+    return token.doc[_sentence_roots(token.doc)[token.i]]
 
 
 def isRoot(token):
@@ -991,166 +1302,272 @@ def isRoot(token):
         return False
 
 
-def rootTree(token, start, end):
-    if token.i < start:
-        start = token.i
-    if token.i > end:
-        end = token.i
-    for child in token.children:
-        if isRoot(child) \
-           and tensed_clause(child):
-            break
-        start, end = rootTree(child, start, end)
+def _root_tree_index(doc: Doc):
+    """
+     This function lays out the children of every token as one array
+     in compressed sparse row form: the children of token i, in
+     document order, are children[offsets[i]:offsets[i + 1]]. It also
+     flags the tokens that head a separate tensed clause (isRoot and
+     tensed_clause both hold). The arrays are cached in doc.user_data.
+    """
+    cached = doc.user_data.get('_awe_root_tree_index')
+    if cached is not None and cached[0] == len(doc):
+        return cached[1:]
+    heads = _head_array(doc)
+    dependents = np.flatnonzero(heads != np.arange(len(doc)))
+    children = dependents[np.argsort(heads[dependents], kind='stable')]
+    offsets = np.zeros(len(doc) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(heads[dependents], minlength=len(doc)),
+              out=offsets[1:])
+    roots, tensed = _clause_flags(doc)
+    blocked = roots & tensed
+    doc.user_data['_awe_root_tree_index'] = \
+        (len(doc), offsets, children, blocked)
+    return offsets, children, blocked
+
+
+@njit(cache=True)
+def _root_tree_walk(i, start, end, offsets, children, blocked):
+    """
+     Walk the subtree under token index i with an explicit stack,
+     widening [start, end] to cover every index reached. A token's
+     remaining children are skipped at the first child flagged in
+     blocked.
+    """
+    stack = np.empty(offsets.shape[0], dtype=np.int64)
+    stack[0] = i
+    size = 1
+    while size > 0:
+        size -= 1
+        tok = stack[size]
+        if tok < start:
+            start = tok
+        if tok > end:
+            end = tok
+        for k in range(offsets[tok], offsets[tok + 1]):
+            child = children[k]
+            if blocked[child]:
+                break
+            stack[size] = child
+            size += 1
     return start, end
 
 
+def rootTree(token, start, end):
+    # Widen [start, end] to cover the token's subtree, without
+    # descending past the first child (of any token we reach) that
+    # heads a separate tensed clause. The walk itself runs over the
+    # cached child and clause flag arrays.
+    offsets, children, blocked = _root_tree_index(token.doc)
+    start, end = _root_tree_walk(token.i,
+                                 start,
+                                 end,
+                                 offsets,
+                                 children,
+                                 blocked)
+    return int(start), int(end)
+
+
+# Words whose presence among a verb's children marks it as the head
+# of a tensed clause. The possessive-ambiguous 's only counts when it
+# is attached as an auxiliary.
+_TENSED_CHILD_TEXTS = frozenset(['am',
+                                 'are',
+                                 'was',
+                                 'were',
+                                 'do',
+                                 'does',
+                                 'did',
+                                 'have',
+                                 'has',
+                                 'had',
+                                 'can',
+                                 'could',
+                                 'will',
+                                 'would',
+                                 'may',
+                                 'might',
+                                 'must',
+                                 '\'d',
+                                 '\'ve',
+                                 '\'ll',
+                                 '’d',
+                                 '’ve',
+                                 '’ll'])
+
+_TENSED_AUX_TEXTS = frozenset(['\'s', '’s'])
+
+# Integer tag ids, so the walk compares token.tag rather than the
+# tag_ strings
+_TENSED_TAG_IDS = frozenset(get_string_id(tag)
+                            for tag in ['VBD', 'VBZ', 'MD'])
+_PARTICIPLE_TAG_IDS = frozenset(get_string_id(tag)
+                                for tag in ['VBG', 'VBN'])
+_MD_ID = get_string_id('MD')
+_TO_ID = get_string_id('TO')
+
+
 def getTensedVerbHead(token):
-    if isRoot(token):
-        return token
-
-    if token.lower_ == 'be' \
-       and 'MD' in [child.tag_ for child in token.children]:
-        return token
-
-    if token.morph is not None \
-       and 'PunctSide=Ini' in str(token.morph) \
-       and isRoot(token):
-        if token.i + 1 < len(token.doc) \
-           and token.nbor(1) is not None:
-            if token.nbor(1) is None:
-                return token
-            return getTensedVerbHead(token.nbor(1))
-    if token.tag_ in ['VBD', 'VBZ', 'MD']:
-        return token
-    if token.pos_ == 'VERB':
-        if isRoot(token) and 'VerbForm=Inf' in str(token.morph):
-            return token
-        if (token.dep_ == 'conj'
-            or token.tag_ in ['VBG', 'VBN']
-            or ('TO' in [item.tag_ for item in token.children])
-                and not isRoot(token)):
-            if token.head is None:
-                return token
-            return getTensedVerbHead(token.head)
-        if 'Tense=Past' in str(token.morph):
-            return token
-        elif 'Tense=Pres' in str(token.morph):
-            return token
-        elif 'am' in [item.lower_ for item in token.children]:
-            return token
-        elif 'are' in [item.lower_ for item in token.children]:
-            return token
-        elif 'was' in [item.lower_ for item in token.children]:
-            return token
-        elif 'were' in [item.lower_ for item in token.children]:
-            return token
-        elif 'do' in [item.lower_ for item in token.children]:
-            return token
-        elif 'does' in [item.lower_ for item in token.children]:
-            return token
-        elif 'did' in [item.lower_ for item in token.children]:
-            return token
-        elif 'have' in [item.lower_ for item in token.children]:
-            return token
-        elif 'has' in [item.lower_ for item in token.children]:
-            return token
-        elif 'had' in [item.lower_ for item in token.children]:
-            return token
-        elif 'can' in [item.lower_ for item in token.children]:
-            return token
-        elif 'could' in [item.lower_ for item in token.children]:
-            return token
-        elif 'will' in [item.lower_ for item in token.children]:
-            return token
-        elif 'would' in [item.lower_ for item in token.children]:
-            return token
-        elif 'may' in [item.lower_ for item in token.children]:
-            return token
-        elif 'might' in [item.lower_ for item in token.children]:
-            return token
-        elif 'must' in [item.lower_ for item in token.children]:
-            return token
-        elif '\'d' in [item.lower_ for item in token.children]:
-            return token
-        elif '\'s' in [item.lower_ for item
-                       in token.children if item.dep_ == 'aux']:
-            return token
-        elif '\'ve' in [item.lower_ for item in token.children]:
-            return token
-        elif '\'ll' in [item.lower_ for item in token.children]:
-            return token
-        elif '’d' in [item.lower_ for item in token.children]:
-            return token
-        elif '’s' in [item.lower_ for item
-                      in token.children if item.dep_ == 'aux']:
+    """
+     This function returns the head of the tensed clause containing
+     the token. Results are memoized per document (by token index)
+     in doc.user_data, since the same tokens get looked up over and
+     over while resolving antecedents.
+    """
+    doc = token.doc
+    cached = doc.user_data.get('_awe_tvh_cache')
+    if cached is None or cached[0] != len(doc):
+        cached = (len(doc), {})
+        doc.user_data['_awe_tvh_cache'] = cached
+    cache = cached[1]
+    if token.i in cache:
+        loc = cache[token.i]
+        return doc[loc] if loc is not None else None
+    result = _tensed_verb_head(token)
+    cache[token.i] = result.i if result is not None else None
+    return result
+
+
+def _tensed_verb_head(token):
+    # Climb the tree one head at a time until we reach a token that
+    # heads a tensed clause (or run out of places to go)
+    while True:
+        if isRoot(token):
             return token
-        elif '’ve' in [item.lower_ for item in token.children]:
+
+        if token.lower_ == 'be' \
+           and any(child.tag == _MD_ID for child in token.children):
             return token
-        elif '’ll' in [item.lower_ for item in token.children]:
+
+        if token.morph is not None \
+           and 'Ini' in token.morph.get('PunctSide') \
+           and isRoot(token):
+            doc = token.doc
+            if token.i + 1 < len(doc):
+                token = doc[token.i + 1]
+                continue
+        if token.tag in _TENSED_TAG_IDS:
             return token
+        if token.pos_ == 'VERB':
+            tense = token.morph.get('Tense')
+            if isRoot(token) and 'Inf' in token.morph.get('VerbForm'):
+                return token
+            # one pass over the children collects everything the
+            # remaining checks need
+            hasTo = False
+            childTexts = set()
+            auxTexts = set()
+            for child in token.children:
+                if child.tag == _TO_ID:
+                    hasTo = True
+                childTexts.add(child.lower_)
+                if child.dep_ == 'aux':
+                    auxTexts.add(child.lower_)
+            if (token.dep_ == 'conj'
+                or token.tag in _PARTICIPLE_TAG_IDS
+                or hasTo
+                    and not isRoot(token)):
+                if token.head is None:
+                    return token
+                token = token.head
+                continue
+            if 'Past' in tense \
+               or 'Pres' in tense:
+                return token
+            if not childTexts.isdisjoint(_TENSED_CHILD_TEXTS) \
+               or not auxTexts.isdisjoint(_TENSED_AUX_TEXTS):
+                return token
+            if token.head is None:
+                return token
+            token = token.head
+        elif isRoot(token):
+            return None
         else:
             if token.head is None:
                 return token
-            return getTensedVerbHead(token.head)
-    elif isRoot(token):
-        return None
-    else:
-        if token.head is None:
-            return token
-        return getTensedVerbHead(token.head)
+            token = token.head
 
 subject_dependencies = ['nsubj',
                         'nsubjpass',
                         'csubj',
                         'csubjpass']
 
+def _dep_ids(labels):
+    return np.array([get_string_id(label) for label in labels],
+                    dtype=np.uint64)
+
+
+# Integer ids of the dependency labels for the children looked up by
+# getSubject, getActiveSubject, getPassiveSubject and getObject
+_CHILD_ROLE_DEPS = {'subject': _dep_ids(subject_dependencies
+                                        + ['poss', 'attr']),
+                    'active': _dep_ids(['nsubj', 'poss', 'csubj']),
+                    'passive': _dep_ids(['nsubjpass', 'poss', 'csubjpass']),
+                    'object': _dep_ids(['dobj'])}
+
+_SP_ID = get_string_id('_SP')
+
+
+def _child_role_maps(doc: Doc):
+    """
+     This function finds, for every token in the document, its first
+     (non-space) child with each of the dependency roles in
+     _CHILD_ROLE_DEPS. The result maps each role to a dictionary from
+     head index to child index, and is cached in doc.user_data so the
+     getSubject family of functions are dictionary lookups.
+    """
+    cached = doc.user_data.get('_awe_child_roles')
+    if cached is not None and cached[0] == len(doc):
+        return cached[1]
+    heads = _head_array(doc)
+    deps = doc.to_array(DEP)
+    candidates = (doc.to_array(TAG) != _SP_ID) \
+        & (heads != np.arange(len(doc)))
+    roles = {}
+    for role, ids in _CHILD_ROLE_DEPS.items():
+        found = {}
+        # children come in document order, so the first one we
+        # see for a head is the one tok.children would yield first
+        for i in np.flatnonzero(candidates & np.isin(deps, ids)):
+            found.setdefault(int(heads[i]), int(i))
+        roles[role] = found
+    doc.user_data['_awe_child_roles'] = (len(doc), roles)
+    return roles
+
+
+def _child_with_role(tok: Token, role):
+    loc = _child_role_maps(tok.doc)[role].get(tok.i)
+    if loc is None:
+        return None
+    return tok.doc[loc]
+
+
 def getSubject(tok: Token):
-    for child in tok.children:
-        if child.tag_ != '_SP':
-            if child.dep_ in subject_dependencies \
-               or child.dep_ == 'poss' \
-               or child.dep_ == 'attr':
-                return child
-    return None
+    return _child_with_role(tok, 'subject')
 
 
 def getActiveSubject(tok: Token):
-    for child in tok.children:
-        if child.tag_ != '_SP':
-            if child.dep_ == 'nsubj' \
-               or child.dep_ == 'poss' \
-               or child.dep_ == 'csubj':
-                return child
-    return None
+    return _child_with_role(tok, 'active')
 
 
 def getPassiveSubject(tok: Token):
-    for child in tok.children:
-        if child.tag_ != '_SP':
-            if child.dep_ == 'nsubjpass' \
-               or child.dep_ == 'poss' \
-               or child.dep_ == 'csubjpass':
-                return child
-    return None
+    return _child_with_role(tok, 'passive')
 
 
 def getObject(tok: Token):
-    for child in tok.children:
-        if child.tag_ != '_SP':
-            if child.dep_ == 'dobj':
-                return child
-    return None
+    return _child_with_role(tok, 'object')
+
+
+_QUOTE_CHARS = frozenset(['"', "'", '“', '”', "''", '``'])
 
 
 def quotationMark(token: Token):
-    if token.tag_ not in ['-LRB-', '-RRB-']:
-        if 'Ini' in token.morph.get('PunctSide'):
-            return True
-        elif 'Fin' in token.morph.get('PunctSide'):
-            return True
-        elif token.text in ['"', '"', "'", '“', '”', "''", '``']:
-            return True
-    return False
+    if token.tag_ in ['-LRB-', '-RRB-']:
+        return False
+    if token.text in _QUOTE_CHARS:
+        return True
+    side = token.morph.get('PunctSide')
+    return 'Ini' in side or 'Fin' in side
 
 
 def getLogicalObject(tok: Token):
@@ -1174,28 +1591,38 @@ def getLogicalObject(tok: Token):
 
 
 def getDative(tok: Token):
-    for child in tok.children:
-        if child.dep_ == 'iobj' \
-           or (child.dep_ == 'dative'
-               and child.tag_ != 'IN'):
-            return child
-        elif (child.dep_ == 'dative'
-              or (child.dep_ == 'prep'
-                  and child.lemma_ == 'to')
-              or (child.dep_ == 'prep'
-                  and child.lemma_ == 'for')):
-            return getDative(child)
-        elif child.dep_ == 'pobj':
-            return child
+    # descend through dative/to/for prepositions until we find the
+    # indirect object itself
+    while tok is not None:
+        nextTok = None
+        for child in tok.children:
+            if child.dep_ == 'iobj' \
+               or (child.dep_ == 'dative'
+                   and child.tag_ != 'IN'):
+                return child
+            elif (child.dep_ == 'dative'
+                  or (child.dep_ == 'prep'
+                      and child.lemma_ == 'to')
+                  or (child.dep_ == 'prep'
+                      and child.lemma_ == 'for')):
+                nextTok = child
+                break
+            elif child.dep_ == 'pobj':
+                return child
+        tok = nextTok
     return None
 
 
 def getPrepObject(tok: Token, tlist):
-    for child in tok.children:
-        if child.dep_ == 'prep' and child.lower_ in tlist:
-            return getPrepObject(child, tlist)
-        elif child.dep_ == 'pobj' and tok.lower_ in tlist:
-            return child
+    while tok is not None:
+        nextTok = None
+        for child in tok.children:
+            if child.dep_ == 'prep' and child.lower_ in tlist:
+                nextTok = child
+                break
+            elif child.dep_ == 'pobj' and tok.lower_ in tlist:
+                return child
+        tok = nextTok
     return None
 
 third_person_pronouns = ['they',
@@ -1208,6 +1635,34 @@ inanimate_3sg_pronouns = ['this',
                           'that',
                           'it']
 
+_NOMINAL_POS = frozenset([NOUN, PROPN])
+
+
+def _pronoun_resolution(tok: Token):
+    """
+     This function returns coreferee's resolution of the token. The
+     answers are memoized in doc.user_data, since the scan for animate
+     antecedents asks about the same pronouns again for every later
+     pronoun in the document. We store token indices rather than
+     tokens, so the cache doesn't keep the document alive or stop
+     Doc.to_bytes from serializing user_data.
+    """
+    doc = tok.doc
+    cached = doc.user_data.get('_awe_pron_resolutions')
+    if cached is None or cached[0] != len(doc):
+        cached = (len(doc), {})
+        doc.user_data['_awe_pron_resolutions'] = cached
+    resolutions = cached[1]
+    if tok.i not in resolutions:
+        res = doc._.coref_chains.resolve(tok)
+        resolutions[tok.i] = [t.i for t in res] \
+            if res is not None else None
+    locs = resolutions[tok.i]
+    if locs is None:
+        return None
+    return [doc[loc] for loc in locs]
+
+
 def scanForAnimatePotentialAntecedents(doc,
                                        loc,
                                        antecedentlocs,
@@ -1228,8 +1683,9 @@ def scanForAnimatePotentialAntecedents(doc,
             altAntecedents.append(loc)
     while pos > 0:
         try:
-            if doc[pos].pos_ in ['PRON']:
-                Resolution = doc._.coref_chains.resolve(doc[pos])
+            token = doc[pos]
+            if token.pos == PRON:
+                Resolution = _pronoun_resolution(token)
                 if Resolution is not None \
                    and len(Resolution) > 0:
                     resolve = []
@@ -1239,28 +1695,27 @@ def scanForAnimatePotentialAntecedents(doc,
 
                 # Let's not ignore a perfectly plausible c-commanding
                 # potential antecedent if it happens to be there ...
-                if doc[loc] in doc[pos].head.subtree \
-                   and doc[pos]._.animate \
+                if doc[loc] in token.head.subtree \
+                   and token._.animate \
                    and (getTensedVerbHead(doc[loc])
-                        != getTensedVerbHead(doc[pos])) \
-                   and ('Number=Plur' in str(doc[pos].morph)
-                        or doc[pos].lower_
+                        != getTensedVerbHead(token)) \
+                   and ('Plur' in token.morph.get('Number')
+                        or token.lower_
                         in ['who', 'whom', 'whoever']):
-                    return [doc[pos].i]
+                    return [token.i]
 
-            elif (doc[pos].pos_ in ['NOUN', 'PROPN']
-                  and doc[pos]._.animate
+            elif (token.pos in _NOMINAL_POS
                   and pos not in antecedentlocs
                   and pos not in blockedLocs
-                  and doc[pos].lower_ not in blockedLex):
+                  and token.lower_ not in blockedLex
+                  and token._.animate):
                 if pos not in altAntecedents:
                     altAntecedents.append(pos)
 
                     # if we have a plural antecedent we don't need
                     # another antecedent to get a plural ...
-                    if doc[pos]._.animate \
-                       and 'Number=Plur' in str(doc[pos].morph):
-                        return [doc[pos].i]
+                    if 'Plur' in token.morph.get('Number'):
+                        return [token.i]
             if len(altAntecedents) > 1:
                 if doc[altAntecedents[0]].text.capitalize() == \
                    doc[altAntecedents[1]].text.capitalize():
@@ -1275,6 +1730,22 @@ def scanForAnimatePotentialAntecedents(doc,
     return [tok.i]
 
 
+# The word sequence probability client is shared by every call to
+# ResolveReference, so we only set it up (and connect) once
+_WSPC_SINGLETON = None
+
+
+def _get_wspc():
+    global _WSPC_SINGLETON
+    if _WSPC_SINGLETON is None:
+        try:
+            _WSPC_SINGLETON = WordseqProbClient()
+        except Exception as e:
+            print('failed to connect to word \
+                   sequence probability server\n', e)
+    return _WSPC_SINGLETON
+
+
 def ResolveReference(tok: Token, doc: Doc):
 
     # if coreference is turned off, stick with the
@@ -1282,6 +1753,52 @@ def ResolveReference(tok: Token, doc: Doc):
     if doc._.coref_chains is None:
         return [tok.i]
 
+    # The coreference part of the answer only depends on the token,
+    # so we memoize it per document. Spans (as passed in by
+    # print_parse_tree) index differently and aren't cached.
+    if isinstance(doc, Doc):
+        cached = doc.user_data.get('_awe_reference_cache')
+        if cached is None or cached[0] != len(doc):
+            cached = (len(doc), {})
+            doc.user_data['_awe_reference_cache'] = cached
+        cache = cached[1]
+        if tok.i not in cache:
+            cache[tok.i] = _coreference_antecedents(tok, doc)
+        doclist = list(cache[tok.i])
+    else:
+        doclist = _coreference_antecedents(tok, doc)
+
+    if tok._.vwp_speaker_ is not None:
+        doclist = []
+        for item in tok._.vwp_speaker_:
+            if doc[item].pos_ != 'PRON' \
+               and doc[item].lemma_ != 'mine':
+                doclist.append(item)
+        if len(doclist) == 0:
+            doclist.append(tok.i)
+        return doclist
+
+    if tok._.vwp_addressee_ is not None:
+        doclist = []
+        for item in tok._.vwp_addressee_:
+            if doc[item].pos_ != 'PRON':
+                doclist.append(item)
+        if len(doclist) == 0:
+            doclist.append(tok.i)
+        return doclist
+
+    if len(doclist) > 0:
+        return doclist
+    else:
+        return [tok.i]
+
+
+def _coreference_antecedents(tok: Token, doc: Doc):
+    """
+     This function returns the antecedents coreferee finds for the
+     token, double checking third person plural pronouns against the
+     word sequence probability server when it is available.
+    """
     # We need to start BERT process that will give us word
     # probabilities in context when we need them. Right now
     # we need that only for checking coreferee results for
@@ -1299,13 +1816,8 @@ def ResolveReference(tok: Token, doc: Doc):
     # TO-DO: start as a subprocess and use subprocess
     # communication protocols instead of websocket.
 
-    wspc = None
-    try:
-        wspc = WordseqProbClient()
-    except Exception as e:
-        print('failed to connect to word \
-               sequence probability server\n', e)
-    Resolution = doc._.coref_chains.resolve(tok)
+    wspc = _get_wspc()
+    Resolution = _pronoun_resolution(tok)
     doclist = []
 
     if tok.lower_ not in third_person_pronouns:
@@ -1321,43 +1833,42 @@ def ResolveReference(tok: Token, doc: Doc):
                         anim = False
                     else:
                         doclist.append(item.i)
-            if not anim:
-                for item in doclist:
-                    start = tok.i - 4
-                    end = tok.i + 4
-                    if start < 0:
-                        start = 0
-                    if end + 1 > len(doc):
-                        end = len(doc)
-                    if tok.lower_ in ['their', 'theirs']:
-                        res1 = wspc.send(['its',
-                                          doc[start:tok.i].text,
-                                          doc[tok.i+1:end].text])
-
-                    else:
-                        res1 = wspc.send(['things',
-                                          doc[start:tok.i].text,
-                                          doc[tok.i+1:end].text])
-
-                    if tok.lower_ in ['their', 'theirs']:
-                        res2 = wspc.send(['his',
-                                          doc[start:tok.i].text,
-                                          doc[tok.i+1:end].text])
-                    else:
-                        res2 = wspc.send(['people',
-                                          doc[start:tok.i].text,
-                                          doc[tok.i+1:end].text])
-
-                    if not anim and res2 > res1:
-                        antecedentlist = \
-                            scanForAnimatePotentialAntecedents(doc,
-                                                               tok.i,
-                                                               doclist,
-                                                               False)
-                        if antecedentlist is not None \
-                           and len(antecedentlist) > 0:
-                            doclist = antecedentlist
-                            break
+            if not anim and len(doclist) > 0:
+                start = tok.i - 4
+                end = tok.i + 4
+                if start < 0:
+                    start = 0
+                if end + 1 > len(doc):
+                    end = len(doc)
+                left = doc[start:tok.i].text
+                right = doc[tok.i+1:end].text
+
+                # Compare an inanimate and an animate filler for the
+                # pronoun's slot, asking for both in one round trip
+                if tok.lower_ in ['their', 'theirs']:
+                    queries = [['its', left, right],
+                               ['his', left, right]]
+                else:
+                    queries = [['things', left, right],
+                               ['people', left, right]]
+                results = None
+                if wspc is not None:
+                    results = wspc.send_batch(queries)
+
+                # the server may be down, in which case we have no
+                # probabilities to compare and fall back on all of
+                # coreferee's antecedents, animate or not
+                if results is None:
+                    doclist = [item.i for item in Resolution]
+                elif results[1] > results[0]:
+                    antecedentlist = \
+                        scanForAnimatePotentialAntecedents(doc,
+                                                           tok.i,
+                                                           doclist,
+                                                           False)
+                    if antecedentlist is not None \
+                       and len(antecedentlist) > 0:
+                        doclist = antecedentlist
 
             if len(doclist) == 0:
                 antecedentlist = scanForAnimatePotentialAntecedents(
@@ -1378,152 +1889,146 @@ def ResolveReference(tok: Token, doc: Doc):
                 for item in Resolution:
                     doclist.append(item.i)
 
-    if tok._.vwp_speaker_ is not None:
-        doclist = []
-        for item in tok._.vwp_speaker_:
-            if doc[item].pos_ != 'PRON' \
-               and doc[item].lemma_ != 'mine':
-                doclist.append(item)
-        if len(doclist) == 0:
-            doclist.append(tok.i)
-        return doclist
+    return doclist
 
-    if tok._.vwp_addressee_ is not None:
-        doclist = []
-        for item in tok._.vwp_addressee_:
-            if doc[item].pos_ != 'PRON':
-                doclist.append(item)
-        if len(doclist) == 0:
-            doclist.append(tok.i)
-        return doclist
 
-    if len(doclist) > 0:
-        return doclist
-    else:
-        return [tok.i]
+reflexives = frozenset(['myself',
+                        'ourselves',
+                        'yourself',
+                        'yourselves',
+                        'himself',
+                        'herself',
+                        'itself',
+                        'themself',
+                        'themselves'])
+
+
+# Integer ids of the dependency labels getDistinctClauseReferences
+# looks for, so the tree walk compares tok.dep rather than tok.dep_
+_CLAUSE_REFERENCE_DEPS = frozenset([get_string_id(label)
+                                    for label in ['nsubj',
+                                                  'nsubjpass',
+                                                  'dobj',
+                                                  'dative']])
+
+_CLAUSE_COMPLEMENT_DEPS = frozenset([get_string_id(label)
+                                     for label in ['acomp',
+                                                   'ccomp',
+                                                   'pcomp',
+                                                   'xcomp']])
 
+_CLAUSE_SUBJECT_DEPS = frozenset([get_string_id('nsubj'),
+                                  get_string_id('nsubjpass')])
 
-reflexives = ['myself',
-              'ourselves',
-              'yourself',
-              'yourselves',
-              'himself',
-              'herself',
-              'itself',
-              'themself',
-              'themselves']
+_PREP_ID = get_string_id('prep')
+_POBJ_ID = get_string_id('pobj')
+
+
+def _clause_reference_candidates(tok: Token):
+    """
+     Yield the dependents of tok whose references count as part of
+     its clause: its own subjects and objects, the objects of its
+     prepositions (including a preposition inside a preposition),
+     and the subjects of its complements
+    """
+    for child in tok.children:
+        dep = child.dep
+        if dep in _CLAUSE_REFERENCE_DEPS:
+            yield child
+        elif dep == _PREP_ID:
+            for grandchild in child.children:
+                if grandchild.dep == _POBJ_ID:
+                    yield grandchild
+                elif grandchild.dep == _PREP_ID:
+                    for ggrandchild in grandchild.children:
+                        if ggrandchild.dep == _POBJ_ID:
+                            yield ggrandchild
+        elif dep in _CLAUSE_COMPLEMENT_DEPS:
+            for grandchild in child.children:
+                if grandchild.dep in _CLAUSE_SUBJECT_DEPS:
+                    yield grandchild
 
 
 def getDistinctClauseReferences(tok: Token, hdoc: Doc):
     referenceList = []
-    if tok.dep_ in ['nsubj',
-                    'nsubjpass',
-                    'dobj',
-                    'dative'] \
+    if tok.dep in _CLAUSE_REFERENCE_DEPS \
        and tok.lower_ not in reflexives:
         referenceList.append(tok.i)
         references = ResolveReference(tok, hdoc)
         for reference in references:
             referenceList.append(reference)
-    for child in tok.children:
-        if child.dep_ in ['nsubj',
-                          'nsubjpass',
-                          'dobj',
-                          'dative'] \
-           and child.lower_ not in reflexives:
-            references = ResolveReference(child, hdoc)
-            for reference in references:
-                if reference not in referenceList:
-                    referenceList.append(reference)
-        if child.dep_ == 'prep':
-            for grandchild in child.children:
-                if grandchild.dep_ == 'pobj' \
-                   and grandchild.lower_ not in reflexives:
-                    references = ResolveReference(grandchild, hdoc)
-                    for reference in references:
-                        if reference not in referenceList:
-                            referenceList.append(reference)
-                elif grandchild.dep_ == 'prep':
-                    for ggrandchild in grandchild.children:
-                        if ggrandchild.dep_ == 'pobj' \
-                           and not ggrandchild.lower_ in reflexives:
-                            references = ResolveReference(ggrandchild, hdoc)
-                            for reference in references:
-                                if reference not in referenceList:
-                                    referenceList.append(reference)
-
-        if child.dep_ in ['acomp',
-                          'ccomp',
-                          'pcomp',
-                          'xcomp']:
-            for grandchild in child.children:
-                if grandchild.dep_ in ['nsubj', 'nsubjpass'] \
-                   and grandchild.lower_ not in reflexives:
-                    references = ResolveReference(grandchild, hdoc)
-                    for reference in references:
-                        if reference not in referenceList:
-                            referenceList.append(reference)
+    seen = set(referenceList)
+    for item in _clause_reference_candidates(tok):
+        if item.lower_ in reflexives:
+            continue
+        for reference in ResolveReference(item, hdoc):
+            if reference not in seen:
+                seen.add(reference)
+                referenceList.append(reference)
     return referenceList
 
 
 def containsDistinctReference(tok1: Token, tok2: Token, hdoc: Doc):
-    referenceList = getDistinctClauseReferences(tok1, hdoc)
-    references = ResolveReference(tok2, hdoc)
-    for reference in references:
-        if reference in referenceList:
-            return True
-    return False
+    referenceList = set(getDistinctClauseReferences(tok1, hdoc))
+    return not referenceList.isdisjoint(ResolveReference(tok2, hdoc))
+
+
+_CONTENT_POS = frozenset([NOUN, PROPN, VERB, ADJ, ADV])
 
 
 def getLinkedNodes(tok: Token):
     linkedList = []
     if tok._.has_governing_subject:
         linkedList.append(tok._.governing_subject)
-    if tok.head.pos_ in ['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV']:
+    if tok.head.pos in _CONTENT_POS:
         linkedList.append(tok.head.i)
     for child in tok.children:
-        if child.pos_ in ['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV']:
+        if child.pos in _CONTENT_POS:
             linkedList.append(child.i)
         else:
             for grandchild in child.children:
-                if grandchild.pos_ in ['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV']:
+                if grandchild.pos in _CONTENT_POS:
                     linkedList.append(grandchild.i)
     return linkedList
 
 
-first_person_pronouns = ['i',
-                         'I'
-                         'me',
-                         'my',
-                         'My',
-                         'mine',
-                         'myself',
-                         'we',
-                         'We',
-                         'us',
-                         'our',
-                         'Our',
-                         'ours',
-                         'Ours',
-                         'ourselves']
+first_person_pronouns = frozenset(['i',
+                                   'I'
+                                   'me',
+                                   'my',
+                                   'My',
+                                   'mine',
+                                   'myself',
+                                   'we',
+                                   'We',
+                                   'us',
+                                   'our',
+                                   'Our',
+                                   'ours',
+                                   'Ours',
+                                   'ourselves'])
 
 def all_zeros(a):
     """
      Detect zero vectors that are problematic for agglomerative clustering
     """
-
+    # token vectors are already arrays, so call their own any() and
+    # skip np.any's conversion and dispatch; anything else (e.g. the
+    # int 0 from summing an empty list of vectors) goes through np.any
+    if isinstance(a, np.ndarray):
+        return not a.any()
     return not np.any(a)
 
 
-second_person_pronouns = ['you',
-                          'You',
-                          'your',
-                          'Your',
-                          'yours',
-                          'Yours',
-                          'yourself',
-                          'yourselves',
-                          'u']
+second_person_pronouns = frozenset(['you',
+                                    'You',
+                                    'your',
+                                    'Your',
+                                    'yours',
+                                    'Yours',
+                                    'yourself',
+                                    'yourselves',
+                                    'u'])
 
 def definite(tok: Token):
     for child in tok.subtree:
@@ -1538,20 +2043,25 @@ def definite(tok: Token):
         break
 
 
+@lru_cache(maxsize=None)
+def _related_forms(lemma: str):
+    """
+     The lemma plus the first derivationally related form of each of
+     its WordNet lemmas. WordNet lookups are slow and documents repeat
+     lemmas a lot, so the results are memoized.
+    """
+    forms = set([lemma])
+    for wnlemma in wn.lemmas(lemma):
+        related = wnlemma.derivationally_related_forms()
+        if len(related) > 0:
+            forms.add(related[0].name())
+    return frozenset(forms)
+
+
 def match_related_form(token, wordset):
-    relatedForms = list(
-        np.unique(
-            [lemma.derivationally_related_forms()[0].name()
-             for lemma in wn.lemmas(token.lemma_)
-             if len(lemma.derivationally_related_forms()) > 0]))
-    if token.lemma_ not in relatedForms:
-        relatedForms.append(token.lemma_)
-    if token._.root not in relatedForms:
-        relatedForms.append(token._.root)
-    for form in relatedForms:
-        if form in wordset:
-            return True
-    return False
+    if token._.root in wordset:
+        return True
+    return not _related_forms(token.lemma_).isdisjoint(wordset)
 
 
 def c_command(token1, token2):
@@ -1577,33 +2087,81 @@ def is_definite_nominal(token):
     return False
 
 
-core_temporal_preps = ['in',
-                       'on',
-                       'over',
-                       'upon',
-                       'at',
-                       'before',
-                       'after',
-                       'during',
-                       'since']
-
-function_word_tags = ['TO',
-                      'MD',
-                      'IN',
-                      'SCONJ',
-                      'WRB',
-                      'WDT',
-                      'WP',
-                      'WP$',
-                      'EX',
-                      'ADP',
-                      'JJR',
-                      'JJS',
-                      'RBR',
-                      'RBS']
+core_temporal_preps = frozenset(['in',
+                                 'on',
+                                 'over',
+                                 'upon',
+                                 'at',
+                                 'before',
+                                 'after',
+                                 'during',
+                                 'since'])
+
+function_word_tags = frozenset(['TO',
+                                'MD',
+                                'IN',
+                                'SCONJ',
+                                'WRB',
+                                'WDT',
+                                'WP',
+                                'WP$',
+                                'EX',
+                                'ADP',
+                                'JJR',
+                                'JJS',
+                                'RBR',
+                                'RBS'])
 
 dative_preps = ['to', 'for', 'accord']
 
+# Dependencies and lemmas that mark the start of a clause, which
+# ends the scope of a temporal phrase
+_SCOPE_BREAK_DEPS = frozenset(['mark',
+                               'aux',
+                               'nsubj',
+                               'relcl',
+                               'acl',
+                               'xcomp'])
+
+_SCOPE_BREAK_LEMMAS = frozenset(['that',
+                                 'which',
+                                 'when',
+                                 'where',
+                                 'why',
+                                 'how',
+                                 'whether',
+                                 'if'])
+
+_TEMPORAL_ADVERB_LEMMAS = frozenset(['early',
+                                     'late',
+                                     'later',
+                                     'earlier',
+                                     'soon',
+                                     'ago',
+                                     'past',
+                                     'since',
+                                     'before',
+                                     'after',
+                                     'beforehand',
+                                     'afterward',
+                                     'afterwards'])
+
+
+def _temporal_scope(tok: Token):
+    """
+     The indices of tok's subtree up to (not including) the first
+     clause boundary. We stop the subtree walk right there.
+    """
+    scope = []
+    append = scope.append
+    for sub in tok.subtree:
+        if sub.dep_ in _SCOPE_BREAK_DEPS \
+           or sub.lemma_ in _SCOPE_BREAK_LEMMAS:
+            break
+        append(sub.i)
+    return scope
+
+
 def temporalPhrase(tok: Token):
 
     # special case for misparse of phrases like 'during
@@ -1623,19 +2181,7 @@ def temporalPhrase(tok: Token):
        or tok.head.pos_ == 'AUX':
         if tok.dep_ == 'advmod' \
            and isRoot(tok) \
-           and tok.lemma_ in ['early',
-                              'late',
-                              'later',
-                              'earlier',
-                              'soon',
-                              'ago',
-                              'past',
-                              'since',
-                              'before',
-                              'after',
-                              'beforehand',
-                              'afterward',
-                              'afterwards']:
+           and tok.lemma_ in _TEMPORAL_ADVERB_LEMMAS:
             return tok.sent.start, \
                    [sub.i for sub in tok.subtree]
 
@@ -1645,26 +2191,7 @@ def temporalPhrase(tok: Token):
             and isRoot(tok.head) \
             and (tok.lemma_.lower() in temporalNouns
                  or is_temporal(tok)):
-            scope = []
-            for sub in tok.subtree:
-                if sub.dep_ in ['mark',
-                                'aux',
-                                'nsubj',
-                                'relcl',
-                                'acl',
-                                'xcomp']:
-                    break
-                if sub.lemma_ in ['that',
-                                  'which',
-                                  'when',
-                                  'where',
-                                  'why',
-                                  'how',
-                                  'whether',
-                                  'if']:
-                    break
-                scope.append(sub.i)
-            return tok.sent.start, scope
+            return tok.sent.start, _temporal_scope(tok)
 
         if tok.dep_ in ['prep', 'mark'] \
            and tok.lower_ in core_temporal_preps:
@@ -1678,145 +2205,179 @@ def temporalPhrase(tok: Token):
                            and tok.lower_ != 'in') \
                        or (child.pos_ == 'VERB'
                            and tok.lower_ != 'in'):
-                        scope = []
-                        for sub in tok.subtree:
-                            if sub.dep_ in ['mark',
-                                            'aux',
-                                            'nsubj',
-                                            'relcl',
-                                            'acl',
-                                            'xcomp']:
-                                break
-                            if sub.lemma_ in ['that',
-                                              'which',
-                                              'when',
-                                              'where',
-                                              'why',
-                                              'how',
-                                              'whether',
-                                              'if']:
-                                break
-                            scope.append(sub.i)
-                        return tok.sent.start, scope
+                        return tok.sent.start, _temporal_scope(tok)
 
     return None
 
 
 time_period = wn.synsets('time_period')
 event = wn.synsets('event')
-temporalNouns = ['time',
-                 'instant',
-                 'point',
-                 'occasion',
-                 'while',
-                 'future',
-                 'past',
-                 'moment',
-                 'second',
-                 'minute',
-                 'hour',
-                 'day',
-                 'week',
-                 'month',
-                 'year',
-                 'century',
-                 'millenium',
-                 'january',
-                 'february',
-                 'march',
-                 'april',
-                 'may',
-                 'june',
-                 'july',
-                 'august',
-                 'september',
-                 'october',
-                 'november',
-                 'december',
-                 'monday',
-                 'tuesday',
-                 'wednesday',
-                 'thursday',
-                 'friday',
-                 'saturday',
-                 'sunday',
-                 'today',
-                 'tomorrow',
-                 'yesterday',
-                 'noon',
-                 'midnight',
-                 'o\'clock',
-                 'a.m.',
-                 'p.m.',
-                 'afternoon',
-                 'morning',
-                 'evening']
+
+
+def _hyponym_names(synset):
+    """
+     The names of the synset and of everything below it in the
+     WordNet hierarchy. The hierarchy doesn't change once it is
+     loaded, so we walk it once instead of walking the hypernyms
+     of every noun we check.
+    """
+    below = synset.closure(lambda s: s.hyponyms())
+    return frozenset([synset.name()] + [s.name() for s in below])
+
+
+# The event hierarchy is large, so we only walk it the first time
+# we are asked about a noun rather than on import
+@lru_cache(maxsize=None)
+def _time_period_synsets():
+    return _hyponym_names(time_period[0])
+
+
+@lru_cache(maxsize=None)
+def _event_synsets():
+    return _hyponym_names(event[0])
+
+temporalNouns = frozenset(['time',
+                           'instant',
+                           'point',
+                           'occasion',
+                           'while',
+                           'future',
+                           'past',
+                           'moment',
+                           'second',
+                           'minute',
+                           'hour',
+                           'day',
+                           'week',
+                           'month',
+                           'year',
+                           'century',
+                           'millenium',
+                           'january',
+                           'february',
+                           'march',
+                           'april',
+                           'may',
+                           'june',
+                           'july',
+                           'august',
+                           'september',
+                           'october',
+                           'november',
+                           'december',
+                           'monday',
+                           'tuesday',
+                           'wednesday',
+                           'thursday',
+                           'friday',
+                           'saturday',
+                           'sunday',
+                           'today',
+                           'tomorrow',
+                           'yesterday',
+                           'noon',
+                           'midnight',
+                           'o\'clock',
+                           'a.m.',
+                           'p.m.',
+                           'afternoon',
+                           'morning',
+                           'evening'])
+
+
+@lru_cache(maxsize=200000)
+def _first_synset(lemma: str):
+    """
+     The first WordNet sense of the lemma, or None if it has none
+    """
+    synsets = wn.synsets(lemma)
+    if len(synsets) == 0:
+        return None
+    return synsets[0]
+
+
+@lru_cache(maxsize=200000)
+def _is_event_lemma(lemma: str):
+    """
+     Whether the first WordNet sense of the lemma falls under event
+     and the lemma has a verb among its derivationally related forms
+    """
+    synset = _first_synset(lemma)
+    if synset is None or synset.name() not in _event_synsets():
+        return False
+    for wnLemma in synset.lemmas():
+        if wnLemma.name() == lemma:
+            for word in wnLemma.derivationally_related_forms():
+                if word.synset().pos() == 'v':
+                    return True
+    return False
+
+
+_TEMPORAL_ENTS = frozenset(['TIME', 'DATE', 'EVENT'])
 
 
 def is_temporal(tok: Token):
+    # the lemma and entity checks settle most tokens before we
+    # ever get to WordNet
     if not tok.pos_ == 'NOUN':
         return False
     if tok.lemma_.lower() in temporalNouns:
         return True
-    if tok.ent_type_ in ['TIME', 'DATE', 'EVENT']:
+    if tok.ent_type_ in _TEMPORAL_ENTS:
         return True
-    synsets = wn.synsets(tok.lemma_)
-    if len(synsets) > 0:
-        hypernyms = set([i for i in
-                         synsets[0].closure(
-                             lambda s:s.hypernyms())])
-        if len(hypernyms) > 0:
-            if time_period[0] in hypernyms \
-               or time_period[0] == synsets[0]:
-                return True
-    return False
+    synset = _first_synset(tok.lemma_)
+    return synset is not None and synset.name() in _time_period_synsets()
 
 
 def is_event(tok: Token):
     if not tok.pos_ == 'NOUN':
         return False
-    synsets = wn.synsets(tok.lemma_)
-    if len(synsets) > 0:
-        hypernyms = set([i for i in
-                        synsets[0].closure(
-                            lambda s: s.hypernyms())])
-        if len(hypernyms) > 0:
-            if (event[0] in hypernyms
-               or event[0] == synsets[0]):
-                for lemma in synsets[0].lemmas():
-                    if token.lemma_ == lemma.name():
-                        for word in lemma.derivationally_related_forms():
-                            if word.synset().pos() == 'v':
-                                return True
-    return False
-
-
-content_tags = ['NN',
-                'NNS',
-                'NNP',
-                'NNPS',
-                'VB',
-                'VBD',
-                'VBG',
-                'VBN',
-                'VBP',
-                'VBZ',
-                'JJ',
-                'JJR',
-                'JJS',
-                'RB',
-                'RBR',
-                'RBS',
-                'RP',
-                'GW',
-                'NOUN',
-                'PROPN',
-                'VERB',
-                'ADJ',
-                'ADV',
-                'CD']
-
-content_pos = ['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV', 'CD']
+    return _is_event_lemma(tok.lemma_)
+
+
+content_tags = frozenset(['NN',
+                          'NNS',
+                          'NNP',
+                          'NNPS',
+                          'VB',
+                          'VBD',
+                          'VBG',
+                          'VBN',
+                          'VBP',
+                          'VBZ',
+                          'JJ',
+                          'JJR',
+                          'JJS',
+                          'RB',
+                          'RBR',
+                          'RBS',
+                          'RP',
+                          'GW',
+                          'NOUN',
+                          'PROPN',
+                          'VERB',
+                          'ADJ',
+                          'ADV',
+                          'CD'])
+
+content_pos = frozenset(['NOUN', 'PROPN', 'VERB', 'ADJ', 'ADV', 'CD'])
+
+_CONTENT_TAG_IDS = np.array([get_string_id(tag) for tag in content_tags],
+                            dtype=np.uint64)
+
+
+def content_tag_mask(doc: Doc):
+    """
+     This function marks the tokens whose tag is in content_tags,
+     caching the boolean array in doc.user_data, so callers that scan
+     the document can test mask[i] instead of looking up tag_.
+    """
+    mask = doc.user_data.get('_awe_content_tags')
+    if mask is not None and len(mask) == len(doc):
+        return mask
+    mask = np.isin(doc.to_array(TAG), _CONTENT_TAG_IDS)
+    doc.user_data['_awe_content_tags'] = mask
+    return mask
 
 nominal_pos = ['ADJ',
                'NOUN',
@@ -1830,101 +2391,101 @@ verbal_pos = ['VERB',
               'ADP',
               'MD']
 
-major_locative_prepositions = ['to',
-                               'from',
-                               'in',
-                               'on',
-                               'at',
-                               'upon',
-                               'over',
-                               'under',
-                               'beneath',
-                               'beyond',
-                               'along',
-                               'against',
-                               'through',
-                               'throughout',
-                               'by',
-                               'near',
-                               'into',
-                               'onto',
-                               'off',
-                               'out']
-
-all_locative_prepositions = ['above',
-                             'across',
-                             'against',
-                             'along',
-                             'amid',
-                             'amidst',
-                             'among',
-                             'amongst',
-                             'around',
-                             'at',
-                             'athwart',
-                             'atop',
-                             'before',
-                             'below',
-                             'beneath',
-                             'beside',
-                             'between',
-                             'betwixt',
-                             'beyond',
-                             'down',
-                             'from',
-                             'in',
-                             'inside',
-                             'into',
-                             'near',
-                             'off',
-                             'on',
-                             'opposite'
-                             'out',
-                             'outside',
-                             'over',
-                             'through',
-                             'throughout',
-                             'to',
-                             'toward',
-                             'under',
-                             'up',
-                             'within',
-                             'without',
-                             'yon',
-                             'yonder']
-
-deictics = ['i',
-            'me',
-            'my',
-            'mine',
-            'myself',
-            'we',
-            'us',
-            'our',
-            'ours',
-            'ourselves',
-            'you',
-            'your',
-            'yours',
-            'yourself',
-            'yourselves',
-            'here',
-            'there',
-            'hither',
-            'thither',
-            'yonder',
-            'yon',
-            'now',
-            'then',
-            'anon',
-            'today',
-            'tomorrow',
-            'yesterday',
-            'this',
-            'that',
-            'these',
-            'those'
-            ]
+major_locative_prepositions = frozenset(['to',
+                                         'from',
+                                         'in',
+                                         'on',
+                                         'at',
+                                         'upon',
+                                         'over',
+                                         'under',
+                                         'beneath',
+                                         'beyond',
+                                         'along',
+                                         'against',
+                                         'through',
+                                         'throughout',
+                                         'by',
+                                         'near',
+                                         'into',
+                                         'onto',
+                                         'off',
+                                         'out'])
+
+all_locative_prepositions = frozenset(['above',
+                                       'across',
+                                       'against',
+                                       'along',
+                                       'amid',
+                                       'amidst',
+                                       'among',
+                                       'amongst',
+                                       'around',
+                                       'at',
+                                       'athwart',
+                                       'atop',
+                                       'before',
+                                       'below',
+                                       'beneath',
+                                       'beside',
+                                       'between',
+                                       'betwixt',
+                                       'beyond',
+                                       'down',
+                                       'from',
+                                       'in',
+                                       'inside',
+                                       'into',
+                                       'near',
+                                       'off',
+                                       'on',
+                                       'opposite'
+                                       'out',
+                                       'outside',
+                                       'over',
+                                       'through',
+                                       'throughout',
+                                       'to',
+                                       'toward',
+                                       'under',
+                                       'up',
+                                       'within',
+                                       'without',
+                                       'yon',
+                                       'yonder'])
+
+deictics = frozenset(['i',
+                      'me',
+                      'my',
+                      'mine',
+                      'myself',
+                      'we',
+                      'us',
+                      'our',
+                      'ours',
+                      'ourselves',
+                      'you',
+                      'your',
+                      'yours',
+                      'yourself',
+                      'yourselves',
+                      'here',
+                      'there',
+                      'hither',
+                      'thither',
+                      'yonder',
+                      'yon',
+                      'now',
+                      'then',
+                      'anon',
+                      'today',
+                      'tomorrow',
+                      'yesterday',
+                      'this',
+                      'that',
+                      'these',
+                      'those'
+                      ])
 
 demonstratives = ['here',
                   'there',
@@ -1933,82 +2494,82 @@ demonstratives = ['here',
                   'these',
                   'those']
 
-adj_noun_or_verb = ['NN',
-                    'NNS',
-                    'NNP',
-                    'NNPS',
-                    'VB',
-                    'VBD',
-                    'VBG',
-                    'VBN',
-                    'VBP',
-                    'VBZ',
-                    'JJ',
-                    'JJR',
-                    'JJS',
-                    'RP',
-                    'GW',
-                    'NOUN',
-                    'PROPN',
-                    'VERB',
-                    'ADJ']
-
-possessive_or_determiner = ['PRP',
-                            'PRP$',
-                            'WDT',
-                            'WP',
-                            'WP$',
-                            'WRB',
-                            'DT']
-
-personal_or_indefinite_pronoun = ['i',
-                                  'me',
-                                  'my',
-                                  'mine',
-                                  'we',
-                                  'us',
-                                  'our',
-                                  'ours',
-                                  'you',
-                                  'your',
-                                  'yours',
-                                  'he',
-                                  'him',
-                                  'they',
-                                  'them',
-                                  'their',
-                                  'theirs',
-                                  'his',
-                                  'she',
-                                  'her',
-                                  'hers',
-                                  'everyone',
-                                  'anyone',
-                                  'everybody',
-                                  'anybody',
-                                  'nobody',
-                                  'someone',
-                                  'somebody',
-                                  'myself',
-                                  'ourselves',
-                                  'yourself',
-                                  'yourselves',
-                                  'himself',
-                                  'herself',
-                                  'themselves',
-                                  'one',
-                                  'oneself',
-                                  'oneselves'
-                                  'anothers',
-                                  'others',
-                                  'another',
-                                  'some',
-                                  'many'
-                                  'few',
-                                  'none',
-                                  'who',
-                                  'whom',
-                                  'whoever']
+adj_noun_or_verb = frozenset(['NN',
+                              'NNS',
+                              'NNP',
+                              'NNPS',
+                              'VB',
+                              'VBD',
+                              'VBG',
+                              'VBN',
+                              'VBP',
+                              'VBZ',
+                              'JJ',
+                              'JJR',
+                              'JJS',
+                              'RP',
+                              'GW',
+                              'NOUN',
+                              'PROPN',
+                              'VERB',
+                              'ADJ'])
+
+possessive_or_determiner = frozenset(['PRP',
+                                      'PRP$',
+                                      'WDT',
+                                      'WP',
+                                      'WP$',
+                                      'WRB',
+                                      'DT'])
+
+personal_or_indefinite_pronoun = frozenset(['i',
+                                            'me',
+                                            'my',
+                                            'mine',
+                                            'we',
+                                            'us',
+                                            'our',
+                                            'ours',
+                                            'you',
+                                            'your',
+                                            'yours',
+                                            'he',
+                                            'him',
+                                            'they',
+                                            'them',
+                                            'their',
+                                            'theirs',
+                                            'his',
+                                            'she',
+                                            'her',
+                                            'hers',
+                                            'everyone',
+                                            'anyone',
+                                            'everybody',
+                                            'anybody',
+                                            'nobody',
+                                            'someone',
+                                            'somebody',
+                                            'myself',
+                                            'ourselves',
+                                            'yourself',
+                                            'yourselves',
+                                            'himself',
+                                            'herself',
+                                            'themselves',
+                                            'one',
+                                            'oneself',
+                                            'oneselves'
+                                            'anothers',
+                                            'others',
+                                            'another',
+                                            'some',
+                                            'many'
+                                            'few',
+                                            'none',
+                                            'who',
+                                            'whom',
+                                            'whoever'])
 indefinite_pronoun = ['anyone',
                       'anybody',
                       'anything',
@@ -2094,40 +2655,40 @@ def contraction(token):
     else:
         return False
 
-loc_sverbs = ['contain',
-              'cover',
-              'include',
-              'occupy']
-
-loc_overbs = ['abandon',
-              'approach',
-              'clear',
-              'depart',
-              'inhabit',
-              'occupy',
-              'empty',
-              'enter',
-              'escape',
-              'exit',
-              'fill',
-              'leave',
-              'near']
-
-locative_adverbs = ['here',
-                    'there',
-                    'where',
-                    'somewhere',
-                    'anywhere']
+loc_sverbs = frozenset(['contain',
+                        'cover',
+                        'include',
+                        'occupy'])
+
+loc_overbs = frozenset(['abandon',
+                        'approach',
+                        'clear',
+                        'depart',
+                        'inhabit',
+                        'occupy',
+                        'empty',
+                        'enter',
+                        'escape',
+                        'exit',
+                        'fill',
+                        'leave',
+                        'near'])
+
+locative_adverbs = frozenset(['here',
+                              'there',
+                              'where',
+                              'somewhere',
+                              'anywhere'])
 
 existential_there = 'EX'
 
-prehead_modifiers = ['mark',
-                     'nsubj',
-                     'nsubjpass',
-                     'aux',
-                     'neg',
-                     'det',
-                     'poss']
+prehead_modifiers = frozenset(['mark',
+                               'nsubj',
+                               'nsubjpass',
+                               'aux',
+                               'neg',
+                               'det',
+                               'poss'])
 
 prehead_modifiers2 = ['det',
                       'aux',
@@ -2143,16 +2704,16 @@ auxiliary_dependencies = ['aux', 'auxpass']
 
 auxiliary_or_adverb = ['aux', 'auxpass', 'advmod', 'npadvmod']
 
-quantifying_determiners = ['any',
-                           'all',
-                           'no',
-                           'each',
-                           'every',
-                           'little',
-                           'some',
-                           'few',
-                           'more',
-                           'most']
+quantifying_determiners = frozenset(['any',
+                                     'all',
+                                     'no',
+                                     'each',
+                                     'every',
+                                     'little',
+                                     'some',
+                                     'few',
+                                     'more',
+                                     'most'])
 
 def clausal_subject_or_complement(tok):
     if (tok.dep_ in ['xcomp', 'oprd', 'csubj']
@@ -2360,7 +2921,7 @@ def elliptical_verb(token):
             or token._.vwp_communication
             or token._.vwp_cognitive)
        and token.i + 1 < len(token.doc)
-       and token.nbor().lower_ in ['so', 'not']):
+       and token.doc[token.i + 1].lower_ in ['so', 'not']):
         return True
     else:
         return False
@@ -2549,6 +3110,87 @@ animate_ent_type = ['PERSON',
 
 nonhuman_ent_type = ['ORG', 'DATE', 'WORK_OF_ART']
 
+# Word lists for the special cases in sylco. _EXCEPTION_ADD are
+# words that need extra syllables, _EXCEPTION_DEL words that need
+# fewer syllables.
+_EXCEPTION_ADD = frozenset(['serious', 'crucial'])
+_EXCEPTION_DEL = frozenset(['fortunately', 'unfortunately'])
+
+_CO_ONE = frozenset(['cool',
+                     'coach',
+                     'coat',
+                     'coal',
+                     'count',
+                     'coin',
+                     'coarse',
+                     'coup',
+                     'coif',
+                     'cook',
+                     'coign',
+                     'coiffe',
+                     'coof',
+                     'court'])
+_CO_TWO = frozenset(['coapt', 'coed', 'coinci'])
+
+_PRE_ONE = frozenset(['preach'])
+
+_LE_EXCEPT = frozenset(['whole',
+                        'mobile',
+                        'pole',
+                        'male',
+                        'female',
+                        'hale',
+                        'pale',
+                        'tale',
+                        'sale',
+                        'aisle',
+                        'whale',
+                        'while'])
+
+_VOWELS = frozenset('eaoui')
+
+_NEGATIVE = frozenset(["doesn't",
+                       "isn't",
+                       "shouldn't",
+                       "couldn't",
+                       "wouldn't"])
+
+
+def _letter_counts(word):
+    """
+     Count, in one pass over the word, what sylco needs from its
+     letters: the vowels, the non-overlapping vowel pairs, the
+     non-overlapping vowel triples, the vowels followed by a
+     non-vowel, and the interior y's with a non-vowel on each side.
+     Within a run of n vowels there are n // 2 pairs and n // 3
+     triples.
+    """
+    vowels = pairs = triples = closed = consonantYs = run = 0
+    before = prev = None
+    for char in word:
+        isVowel = char in _VOWELS
+        if isVowel:
+            run += 1
+        elif run > 0:
+            vowels += run
+            pairs += run // 2
+            triples += run // 3
+            closed += 1
+            run = 0
+        if prev == "y" \
+           and before is not None \
+           and before not in _VOWELS \
+           and not isVowel:
+            consonantYs += 1
+        before = prev
+        prev = char
+    vowels += run
+    pairs += run // 2
+    triples += run // 3
+    return vowels, pairs, triples, closed, consonantYs
+
+
+@lru_cache(maxsize=65536)
 def sylco(word):
     """
     from discussion posted to
@@ -2562,30 +3204,6 @@ def sylco(word):
     if not alphanum_word(word):
         return None
 
-    # exception_add are words that need extra syllables
-    # exception_del are words that need less syllables
-
-    exception_add = ['serious', 'crucial']
-    exception_del = ['fortunately', 'unfortunately']
-
-    co_one = ['cool',
-              'coach',
-              'coat',
-              'coal',
-              'count',
-              'coin',
-              'coarse',
-              'coup',
-              'coif',
-              'cook',
-              'coign',
-              'coiffe',
-              'coof',
-              'court']
-    co_two = ['coapt', 'coed', 'coinci']
-
-    pre_one = ['preach']
-
     syls = 0  # added syllable number
     disc = 0  # discarded syllable number
 
@@ -2598,125 +3216,82 @@ def sylco(word):
     # discard "es" and "ed" at the end. If it has only 1 vowel or 1 set
     # of consecutive vowels, discard. (like "speed", "fled" etc.)
 
-    if word[-2:] == "es" or word[-2:] == "ed":
-        doubleAndtripple_1 = len(re.findall(r'[eaoui][eaoui]', word))
-        if doubleAndtripple_1 > 1 \
-           or len(re.findall(r'[eaoui][^eaoui]', word)) > 1:
-            if word[-3:] == "ted" \
-               or word[-3:] == "tes" \
-               or word[-3:] == "ses" \
-               or word[-3:] == "ied" \
-               or word[-3:] == "ies":
-                pass
-        else:
-            disc += 1
+    numVowels, doubleAndtripple, tripple, vowelConsonant, consonantYs = \
+        _letter_counts(word)
 
-    # 3) discard trailing "e", except where ending is "le"
-    le_except = ['whole',
-                 'mobile',
-                 'pole',
-                 'male',
-                 'female',
-                 'hale',
-                 'pale',
-                 'tale',
-                 'sale',
-                 'aisle',
-                 'whale',
-                 'while']
-
-    if word[-1:] == "e":
-        if word[-2:] == "le" and word not in le_except:
-            pass
+    if word.endswith(("es", "ed")) \
+       and doubleAndtripple <= 1 \
+       and vowelConsonant <= 1:
+        disc += 1
 
-        else:
-            disc += 1
+    # 3) discard trailing "e", except where ending is "le"
+    if word.endswith("e") \
+       and (not word.endswith("le") or word in _LE_EXCEPT):
+        disc += 1
 
     # 4) check if consecutive vowels exists, triplets or pairs,
     #    count them as one.
 
-    doubleAndtripple = len(re.findall(r'[eaoui][eaoui]', word))
-    tripple = len(re.findall(r'[eaoui][eaoui][eaoui]', word))
     disc += doubleAndtripple + tripple
 
-    # 5) count remaining vowels in word.
-    numVowels = len(re.findall(r'[eaoui]', word))
+    # 5) count remaining vowels in word (numVowels, from above).
 
     # 6) add one if starts with "mc"
-    if word[:2] == "mc":
+    if word.startswith("mc"):
         syls += 1
 
     # 7) add one if ends with "y" but is not surrouned by vowel
-    if word[-1:] == "y" and word[-2] not in "aeoui":
+    if word.endswith("y") and word[-2] not in _VOWELS:
         syls += 1
 
     # 8) add one if "y" is surrounded by non-vowels and is
     #    not in the last word.
 
-    for i, j in enumerate(word):
-        if j == "y":
-            if (i != 0) and (i != len(word) - 1):
-                if word[i-1] not in "aeoui" and word[i+1] not in "aeoui":
-                    syls += 1
+    syls += consonantYs
 
     # 9) if starts with "tri-" or "bi-" and is followed by a vowel,
     #    add one.
 
-    if word[:3] == "tri" and word[3] in "aeoui":
+    if word.startswith("tri") and word[3] in _VOWELS:
         syls += 1
 
-    if word[:2] == "bi" and word[2] in "aeoui":
+    if word.startswith("bi") and word[2] in _VOWELS:
         syls += 1
 
     # 10) if ends with "-ian", should be counted as two syllables,
     #  except for "-tian" and "-cian"
 
-    if word[-3:] == "ian" and (word[-4:] != "cian" or word[-4:] != "tian"):
-        if word[-4:] == "cian" or word[-4:] == "tian":
-            pass
-        else:
-            syls += 1
+    if word.endswith("ian") and not word.endswith(("cian", "tian")):
+        syls += 1
 
     # 11) if starts with "co-" and is followed by a vowel, check if exists
     # in the double syllable dictionary, if not, check if in single
     # dictionary and act accordingly.
 
-    if word[:2] == "co" and word[2] in 'eaoui':
-
-        if word[:4] in co_two or word[:5] in co_two or word[:6] in co_two:
-            syls += 1
-        elif (word[:4] in co_one
-              or word[:5] in co_one
-              or word[:6] in co_one):
-            pass
-        else:
+    if word.startswith("co") and word[2] in _VOWELS:
+        prefixes = (word[:4], word[:5], word[:6])
+        if not _CO_TWO.isdisjoint(prefixes) \
+           or _CO_ONE.isdisjoint(prefixes):
             syls += 1
 
     # 12) if starts with "pre-" and is followed by a vowel, check if
     # exists in the double syllable dictionary, if not, check if in
     # single dictionary and act accordingly.
 
-    if word[:3] == "pre" and word[3] in 'eaoui':
-        if word[:6] in pre_one:
-            pass
-        else:
-            syls += 1
+    if word.startswith("pre") and word[3] in _VOWELS \
+       and word[:6] not in _PRE_ONE:
+        syls += 1
 
     # 13) check for "-n't" and cross match with dictionary to add syllable.
-    negative = ["doesn't", "isn't", "shouldn't", "couldn't", "wouldn't"]
-
-    if word[-3:] == "n't":
-        if word in negative:
-            syls += 1
-        else:
-            pass
+    if word.endswith("n't") and word in _NEGATIVE:
+        syls += 1
 
     # 14) Handling the exceptional words.
 
-    if word in exception_del:
+    if word in _EXCEPTION_DEL:
         disc += 1
 
-    if word in exception_add:
+    if word in _EXCEPTION_ADD:
         syls += 1
 
     sylcount = numVowels - disc + syls
@@ -2727,11 +3302,15 @@ def sylco(word):
     return sylcount
 
 
+# alphanum_word only looks at the first character: a word may
+# contain hyphens, apostrophes and periods, but may not start with one
+_WORD_INITIALS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+                           'abcdefghijklmnopqrstuvwxyz'
+                           '0123456789')
+
+
 def alphanum_word(word: str):
-    if not re.match('[-A-Za-z0-9\'.]', word) or re.match('[-\'.]+', word):
-        return False
-    else:
-        return True
+    return word[:1] in _WORD_INITIALS
  
 def is_float(str):
     try:
@@ -2850,27 +3429,27 @@ def newSpanEntry(name, left, right, hdoc, value):
         to associate with the span, which depends on the
         specific indicator.
     '''
-    entry = {}
-    entry['name'] = name
-    entry['offset'] = hdoc[left].idx
-    entry['startToken'] = left
-    entry['endToken'] = right
-    entry['length'] = hdoc[right].idx \
-        + len(hdoc[right].text_with_ws) \
-        - hdoc[left].idx
-    entry['value'] = value
-    entry['text'] = hdoc[left:right+1].text
-    return entry
-
-def newTokenEntry(name, token):
-    entry = {}
-    entry['text'] = token.text_with_ws
-    entry['offset'] = token.idx
-    entry['tokenIdx'] = token.i
-    entry['length'] = len(token.text_with_ws)
-    entry['name'] = name
-    entry['value'] = None
-    return entry
+    # The entries are plain dicts, since callers and the JSON
+    # output depend on that format. We build each one in a single
+    # dict display (keys in the same order as always).
+    first = hdoc[left]
+    last = hdoc[right]
+    return {'name': name,
+            'offset': first.idx,
+            'startToken': left,
+            'endToken': right,
+            'length': last.idx + len(last.text_with_ws) - first.idx,
+            'value': value,
+            'text': hdoc[left:right+1].text}
+
+def newTokenEntry(name, token, value=None):
+    text = token.text_with_ws
+    return {'text': text,
+            'offset': token.idx,
+            'tokenIdx': token.i,
+            'length': len(text),
+            'name': name,
+            'value': value}
     
 def setTokenEntry(name, token, value):
     '''
@@ -2885,10 +3464,20 @@ def setTokenEntry(name, token, value):
        wish to associate with this function, which depends on
        the specific indicator.
     '''
-    entry = newTokenEntry(name, token)
+    return newTokenEntry(name, token, _indicator_getter(name)(token))
 
+
+@lru_cache(maxsize=1024)
+def _indicator_getter(name):
+    '''
+       Resolve an indicator name to a function that reads its value
+       off a token. The answer only depends on the name, so we work
+       it out once per indicator rather than once per token. (Names
+       that don't resolve raise, and so are not cached, in case the
+       extension is registered later.)
+    '''
     if name in built_in_attributes:
-        entry['value'] = getattr(token, name)
+        return operator.attrgetter(name)
 
     #######################################
     # Create entries for named extensions #
@@ -2899,16 +3488,12 @@ def setTokenEntry(name, token, value):
     # attribute.                          #
     # TBD: put security check in for this #
     #######################################
-    elif token.has_extension(name):
-        # TODO: Use Token.get_extension
-        # https://spacy.io/api/token
-        entry['value'] = getattr(token._, name)
+    elif Token.has_extension(name):
+        return lambda token: getattr(token._, name)
     else:
         raise AWE_Workbench_Error('Invalid indicator '
             + name)
 
-    return entry
-
 def createSpanInfo(indicator, document):
     '''
         Create records for span data in the format used
@@ -2940,26 +3525,30 @@ def createSpanInfo(indicator, document):
         delimiter = ''.join(indicator[10:])
         segmentNo = 0
         currentStart = 0
-        currentEnd = 0
-        for token in document:
-            currentEnd = token.i
-            if delimiter in token.text:
-                entry = \
-                    newSpanEntry(indicator,
-                        currentStart,
-                        currentEnd-1,
-                        document,
-                        delimiter)
-                baseInfo.append(entry)
-                currentStart = token.i
-                segmentNo += 1
-        if currentEnd > currentStart:
+        # find the delimiting tokens in one pass, then only do
+        # work at the segment boundaries
+        bounds = np.flatnonzero(
+            np.fromiter((delimiter in token.text for token in document),
+                        dtype=bool,
+                        count=len(document)))
+        for bound in bounds.tolist():
+            entry = \
+                newSpanEntry(indicator,
+                    currentStart,
+                    bound-1,
+                    document,
+                    delimiter)
+            baseInfo.append(entry)
+            currentStart = bound
+            segmentNo += 1
+        lastToken = max(len(document) - 1, 0)
+        if lastToken > currentStart:
             entry = \
                 newSpanEntry(indicator,
                     currentStart,
-                    token.i,
+                    lastToken,
                     document,
-                    segmentNo)                    
+                    segmentNo)
             baseInfo.append(entry)
     else:
         raise AWE_Workbench_Error(
@@ -2968,6 +3557,15 @@ def createSpanInfo(indicator, document):
 
     return baseInfo
 
+# Comparison operators accepted as filter functions
+_COMPARERS = {'==': operator.eq,
+              '<': operator.lt,
+              '>': operator.gt,
+              '<=': operator.le,
+              '>=': operator.ge,
+              '!=': operator.ne}
+
+
 def applySpanFilters(token, entry, filters):
     '''
         Given an entry in the format used to describe
@@ -2975,26 +3573,17 @@ def applySpanFilters(token, entry, filters):
         check if that entry passes the specified filters.
     '''
     filterEntry = False
-    for (function, returnValues) in filters:
-        if type(filters) == list and len(filters)>0:
-            for (function, returnValues) in filters:
-                for returnValue in returnValues:
-                    comparers = {
-                        "==": lambda x, y: x==y,
-                        "<": lambda x, y: x<y,
-                        ">": lambda x, y: x>y,
-                        "<=": lambda x, y: x<=y,
-                        ">=": lambda x, y: x>=y,
-                        "!=": lambda x, y: x!=y
-                    }
-                    # Direct comparison with the returnValue
-                    if function in comparers and entry['value'] is None:
+    if type(filters) == list and len(filters)>0:
+        valueType = type(entry['value'])
+        for (function, returnValues) in filters:
+            for returnValue in returnValues:
+                # Direct comparison with the returnValue
+                if function in _COMPARERS and entry['value'] is None:
+                    return True
+                if function in _COMPARERS \
+                   and valueType in [int, float, str]:
+                    if not _COMPARERS[function](entry['value'], returnValue):
                         return True
-                    if function in comparers \
-                       and type(entry['value']) \
-                          in [int, float, str]:
-                        if not comparers[function](entry['value'], returnValue):
-                            return True
     return False
 
 def applyTokenFilters(token, entry, filters):
@@ -3002,139 +3591,171 @@ def applyTokenFilters(token, entry, filters):
         Given an entry in the format used to describe
         indicator values for tokens by the AWE_Info function,
         check if that entry passes the specified filters.
+        Returns True if the entry should be filtered out.
     '''
-    filterEntry = False
-    for (function, returnValues) in filters:
-        if type(filters) == list and len(filters)>0:
-            for (function, returnValues) in filters:
-                for returnValue in returnValues:
-                    comparers = {
-                        "==": lambda x, y: x==y,
-                        "<": lambda x, y: x<y,
-                        ">": lambda x, y: x>y,
-                        "<=": lambda x, y: x<=y,
-                        ">=": lambda x, y: x>=y,
-                        "!=": lambda x, y: x!=y
-                    }
-                    # Direct comparison with the returnValue
-                    if function in comparers and entry['value'] is None:
-                        return True
-
-                    if function in comparers \
-                       and type(entry['value']) \
-                          in [int, float, str]:
-                        if not comparers[function](entry['value'], returnValue):
-                            return True
+    if type(filters) == list and len(filters)>0:
+        return _filter_token_value(token, entry['value'], filters)
+    return False
 
-                    # The returnValue specifies a boolean value
-                    elif returnValue in [True, False, 'True', 'False'] \
-                       and entry['value'] is None:
-                        return True
-                    
-                    elif type(entry['value']) == bool \
-                       and returnValue in [True, 'True']:
-                        if not entry['value']:
-                            return True
-
-                    elif type(entry['value']) == bool \
-                       and returnValue in [False, 'False']:
-                         if entry['value']:
-                             return True
-
-                    # Negation
-                    elif function == 'not' \
-                       and type(entry['value']) == bool:
-                        if entry['value']:
-                            return True
-
-                    # Spacy built-in boolean token flags
-                    elif function in built_in_flags:
-                        if returnValue in [True, 'True']:
-                            if not getattr(token, function):
-                                return True
-                        elif returnValue in ['False', False]:
-                            if getattr(token, function):
-                                return True
-                        else:
-                            raise AWE_Workbench_Error(
-                                'Invalid selection value '
-                                + returnValue)
-
-                    # Spacy built-in string functions
-                    elif function in built_in_string_functions:
-                        if getattr(token, function) == returnValue:
-                            return False
-                        else:
-                            filterEntry = True
-
-                    # Spacy extension attributes, if true boolean
-                    # flags or numeric (non-zero) values
-                    elif token.has_extension(function):
-                        if getattr(token._, function) is not None \
-                           and getattr(token._, function) \
-                              in [True, False, 'True', 'False']:
-                             if returnValue in [True, 'True']:
-                                 if not getattr(token._,
-                                                function):
-                                     return False
-                             elif returnValue in [False, 'False']:
-                                 if getattr(token._,
-                                            function):
-                                     return False
-                             else:
-                                 filterEntry = True
 
-                    else:
-                        raise AWE_Workbench_Error(
-                            'Invalid filter ' + function)
-                if filterEntry:
-                    return True
+def _filter_token_value(token, value, filters):
+    '''
+        Apply a (nonempty) filter list to a token and its indicator
+        value. Returns True if the token should be filtered out.
+        The filters only look at the value of the entry, so AWE_Info
+        can call this before it builds the entry.
+    '''
+    valueType = type(value)
+    for (function, returnValues) in filters:
+        outcome = _token_filter_outcome(token,
+                                        value,
+                                        valueType,
+                                        function,
+                                        returnValues)
+        if outcome is not None:
+            return outcome
     return False
 
 
-def applySpanTransformations(transformations, baseInfo):
+def _token_filter_outcome(token, entryValue, valueType,
+                          function, returnValues):
     '''
-       Apply transformation to span entries in the format used
-       by the AWE_Info function, in the order listed
+        Apply one filter to a token and its indicator value. Returns
+        True if the token fails the filter, False if it is accepted
+        outright (without looking at any further filters), or None if
+        the decision is left to the remaining filters.
     '''
+    mismatch = False
+    for returnValue in returnValues:
+        # Direct comparison with the returnValue
+        if function in _COMPARERS and entryValue is None:
+            return True
+
+        if function in _COMPARERS \
+           and valueType in [int, float, str]:
+            if not _COMPARERS[function](entryValue, returnValue):
+                return True
+
+        # The returnValue specifies a boolean value
+        elif returnValue in [True, False, 'True', 'False'] \
+           and entryValue is None:
+            return True
+
+        elif valueType == bool \
+           and returnValue in [True, 'True']:
+            if not entryValue:
+                return True
+
+        elif valueType == bool \
+           and returnValue in [False, 'False']:
+             if entryValue:
+                 return True
+
+        # Negation
+        elif function == 'not' \
+           and valueType == bool:
+            if entryValue:
+                return True
+
+        # Spacy built-in boolean token flags
+        elif function in built_in_flags:
+            value = getattr(token, function)
+            if returnValue in [True, 'True']:
+                if not value:
+                    return True
+            elif returnValue in ['False', False]:
+                if value:
+                    return True
+            else:
+                raise AWE_Workbench_Error(
+                    'Invalid selection value '
+                    + returnValue)
+
+        # Spacy built-in string functions
+        elif function in built_in_string_functions:
+            if getattr(token, function) == returnValue:
+                return False
+            else:
+                mismatch = True
+
+        # Spacy extension attributes, if true boolean
+        # flags or numeric (non-zero) values
+        elif token.has_extension(function):
+            value = getattr(token._, function)
+            if value is not None \
+               and value in [True, False, 'True', 'False']:
+                 if returnValue in [True, 'True']:
+                     if not value:
+                         return False
+                 elif returnValue in [False, 'False']:
+                     if value:
+                         return False
+                 else:
+                     mismatch = True
+
+        else:
+            raise AWE_Workbench_Error(
+                'Invalid filter ' + function)
+    if mismatch:
+        return True
+    return None
+
+
+# Security check for the names of indicators, transformations and
+# summary functions passed in from outside. The whole name has to
+# match, not just a leading run of word characters.
+_RE_NAME = re.compile(r'[A-Za-z0-9_]+\Z')
+
+
+def _check_transformations(transformations):
     for transformation in transformations:
         # security check
-        if not re.match('[A-Za-z0-9_]+', transformation):
+        if not _RE_NAME.match(transformation):
             raise AWE_Workbench_Error(
                 'Invalid transformation'
                 + transformation)                   
 
-        newInfo = []
-        for entry in baseInfo:
-            newEntry = entry
-            if transformation == 'text':
-                 newEntry['value'] = entry['text']
-                 newEntry['name'] = 'text_' \
-                     + entry['name']
-
-            elif transformation == 'lower':
-                 newEntry['value'] = entry['text'].lower()
-                 newEntry['name'] = 'lower_' \
-                     + entry['name']
-
-            elif transformation == 'len' \
-               and type(entry['value']) in [str, list]:
-                newEntry['value'] = entry['length']
-                newEntry['name'] = 'clen_' \
-                    + entry['name']
-
-            if transformation == 'tokenlen' \
-               and type(entry['value']) == str:
-                newEntry['value'] = 1 \
-                    + entry['endToken'] \
-                    - entry['startToken']
-                newEntry['name'] = 'tlen_' \
-                     + entry['name']
-
-            newInfo.append(newEntry)
-        baseInfo = newInfo
+
+def applySpanTransformations(transformations, baseInfo):
+    '''
+       Apply transformation to span entries in the format used
+       by the AWE_Info function, in the order listed
+    '''
+    _check_transformations(transformations)
+
+    # Each transformation only looks at the entry it changes, so
+    # we can take each entry through the whole list in one pass
+    for entry in baseInfo:
+        for transformation in transformations:
+            _transform_span_entry(entry, transformation)
     return baseInfo
 
+
+def _transform_span_entry(entry, transformation):
+    if transformation == 'text':
+         entry['value'] = entry['text']
+         entry['name'] = 'text_' \
+             + entry['name']
+
+    elif transformation == 'lower':
+         entry['value'] = entry['text'].lower()
+         entry['name'] = 'lower_' \
+             + entry['name']
+
+    elif transformation == 'len' \
+       and type(entry['value']) in [str, list]:
+        entry['value'] = entry['length']
+        entry['name'] = 'clen_' \
+            + entry['name']
+
+    if transformation == 'tokenlen' \
+       and type(entry['value']) == str:
+        entry['value'] = 1 \
+            + entry['endToken'] \
+            - entry['startToken']
+        entry['name'] = 'tlen_' \
+             + entry['name']
+
     
 def applyTokenTransformations(entry, token, transformations):
     '''
@@ -3142,28 +3763,31 @@ def applyTokenTransformations(entry, token, transformations):
        used by the AWE_Info function, transform the value
        as specified by the transformations list
     '''
+    _check_transformations(transformations)
+    return _transform_token_entry(entry, token, transformations)
+
+
+def _transform_token_entry(entry, token, transformations):
+    '''
+       The body of applyTokenTransformations, for callers that have
+       already checked the transformation names
+    '''
     for transformation in transformations:
-    
-        # security check
-        if not re.match('[A-Za-z0-9_]+', transformation):
-            raise AWE_Workbench_Error(
-                'Invalid transformation'
-                + transformation)                   
 
         if transformation == 'text':
             entry['value'] = entry['text'].strip()
             entry['name'] = 'text_' + entry['name']                  
 
         elif transformation == 'lower':
-            entry['value'] = getattr(token, 'lower_').strip()
+            entry['value'] = token.lower_.strip()
             entry['name'] = 'lower_' + entry['name']                  
 
         elif transformation == 'root':
-            entry['value'] = getattr(token._, 'root')
+            entry['value'] = token._.root
             entry['name'] = 'text_' + entry['name']                  
 
         elif transformation == 'lemma':
-            entry['value'] = getattr(token, 'lemma_')
+            entry['value'] = token.lemma_
             entry['name'] = 'text_' + entry['name']                  
 
         elif transformation == 'len' \
@@ -3214,6 +3838,99 @@ def applyTokenTransformations(entry, token, transformations):
     return entry
 
 
+def _unique_categories(values):
+    '''
+        List the distinct entries in the values column, most
+        frequent first, with non-string values converted to JSON
+        strings. Distinct values
+        can have the same JSON form (1 and '1', say), so we still
+        deduplicate after converting.
+    '''
+    output = []
+    seen = set()
+    for category in values.value_counts().index.values:
+        if type(category) != str:
+            category = json.dumps(category)
+        if category not in seen:
+            seen.add(category)
+            output.append(category)
+    return output
+
+
+# Summaries computed straight from an array of the values, no
+# DataFrame required
+_ARRAY_SUMMARIES = {'mean': np.ndarray.mean,
+                    'median': np.median,
+                    'stdev': lambda values: values.std(ddof=1),
+                    'max': np.ndarray.max,
+                    'min': np.ndarray.min}
+
+
+def _summarize_array(baseInfo, summaryType):
+    '''
+        Apply one of the _ARRAY_SUMMARIES to the values in baseInfo,
+        skipping missing (None or NaN) values
+    '''
+    return _summarize_values([entry.get('value') for entry in baseInfo],
+                             summaryType)
+
+
+def _summarize_values(rawValues, summaryType):
+    '''
+        Apply one of the _ARRAY_SUMMARIES to a list of values,
+        skipping missing (None or NaN) values
+    '''
+    if len(rawValues) == 0:
+        return None
+    if summaryType == 'stdev' and len(rawValues) <= 2:
+        return None
+    present = [value for value in rawValues if value is not None]
+    try:
+        values = np.array(present)
+    except ValueError:
+        # lists of different lengths
+        values = None
+    # list-valued indicators would otherwise give a 2-D array, and
+    # we would summarize the flattened lists
+    if values is None \
+       or values.ndim != 1 \
+       or values.dtype.kind not in 'biuf':
+        raise AWE_Workbench_Error(
+            'Cannot summarize non numeric data')
+    # a missing value makes the column a float column, as it
+    # would be in a DataFrame
+    if len(present) < len(rawValues) and values.dtype.kind in 'iu':
+        values = values.astype(np.float64)
+    elif values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            values = values[~missing]
+    if values.size == 0 \
+       or (summaryType == 'stdev'
+           and values.size < 2
+           and values.dtype.kind in 'biuf'):
+        return float('nan')
+    # only the maximum and minimum of an integer array are integers
+    integral = summaryType in ('max', 'min') \
+        and values.dtype.kind in 'iu'
+    result = _ARRAY_SUMMARIES[summaryType](values)
+    if integral:
+        return int(result)
+    else:
+        return float(result)
+
+
+# What each of the other summaries gives for an empty table
+_EMPTY_SUMMARIES = {'counts': json.dumps({}),
+                    'total': 0,
+                    'uniq': json.dumps({}),
+                    'totaluniq': 0,
+                    'proportion': 0,
+                    'percent': 0,
+                    '': json.dumps({}),
+                    None: json.dumps({})}
+
+
 def applySummaryFunction(info, baseInfo, summaryType, document):
     '''
         Given a matrix of information about indicator values
@@ -3224,28 +3941,29 @@ def applySummaryFunction(info, baseInfo, summaryType, document):
 
     # Security check
     if summaryType != '' and summaryType is not None \
-       and not re.match('[A-Za-z0-9_]+', summaryType):
+       and not _RE_NAME.match(summaryType):
+        raise AWE_Workbench_Error('Invalid summary function '
+            + summaryType)
+
+    # Nothing to summarize
+    if len(info) == 0:
+        if summaryType in _EMPTY_SUMMARIES:
+            return _EMPTY_SUMMARIES[summaryType]
+        elif summaryType in _ARRAY_SUMMARIES:
+            return None
         raise AWE_Workbench_Error('Invalid summary function '
             + summaryType)
 
-    if len(info) == 0 \
-       and (summaryType is None
-            or summaryType==''):
-        return json.dumps({})
+    # Look the value column up once for all the summaries below
+    values = info.get('value')
 
     # Counts of unique values
     if summaryType == "counts":
-        if len(info)==0:
-            return json.dumps({})
         output = {}
-        summary = info['value'].value_counts()
+        summary = values.value_counts()
         if len(summary) == 0:
             return json.dumps({})
-        for i, value in enumerate(summary):
-            entry = {}
-            category = summary.index[i]
-            if type(summary.index[i]) != str:
-                category = summary.index[i]
+        for category, value in summary.items():
             if type(category) == list:
                 category = json.dumps(category)
             output[str(category)] = int(value)
@@ -3257,110 +3975,43 @@ def applySummaryFunction(info, baseInfo, summaryType, document):
 
     # list of unique values
     elif summaryType == "uniq":
-        if len(info)==0:
-            return json.dumps({})
-        output = []
-        summary = info['value'].value_counts()
-        for i, value in enumerate(summary):
-            category = summary.index[i]
-            if type(summary.index[i]) != str:
-                category = json.dumps(summary.index[i])
-            if category not in output:
-                output.append(category)
-        return json.dumps(output)
+        return json.dumps(_unique_categories(values))
 
     # Total number of unique values
     elif summaryType == "totaluniq":
-        if len(info)==0:
-            return 0
-        output = []
-        summary = info['value'].value_counts()
-        for i, value in enumerate(summary):
-            category = summary.index[i]
-            if type(summary.index[i]) != str:
-                category = json.dumps(summary.index[i])
-            if category not in output:
-                output.append(category)
-        return len(output)
+        return len(_unique_categories(values))
 
     # Proportion or percent
     elif summaryType in ["proportion", "percent"]:
-        if len(info)==0:
-            return 0
         total = 0
-        if 'tokenIdx' in info.keys():
-            for index, row in info.iterrows():
-                if row['value']:
-                    total += 1
-        elif 'startToken' in info.keys():
-            for index, row in info.iterrows():
-                total += 1 + row['endToken'] - row['startToken']       
-        if len(info) > 0:
-            if summaryType == "proportion":
-                return total/len(document)
+        if any('tokenIdx' in entry for entry in baseInfo):
+            array = values.to_numpy()
+            if array.dtype.kind in 'biuf':
+                # numeric and boolean columns are counted in place
+                total = int(np.count_nonzero(array))
             else:
-                return round(100*total/len(document))
+                total = int(values.astype(bool).to_numpy().sum())
+        elif any('startToken' in entry for entry in baseInfo):
+            total = sum(1 + entry['endToken'] - entry['startToken']
+                        for entry in baseInfo)
+        if summaryType == "proportion":
+            return total/len(document)
         else:
-            return 0
+            # round(100*total/len(document)) in integer arithmetic,
+            # halves still going to the even neighbour
+            percent, remainder = divmod(100*total, len(document))
+            if 2*remainder > len(document) \
+               or (2*remainder == len(document) and percent % 2 == 1):
+                percent += 1
+            return percent
             
-    # Mean
-    elif summaryType == "mean":
-        if len(info)==0:
-            return None
-        mean = info['value'].mean(axis=0)
-        if type(mean) == type(np.int64(0)):
-            return int(mean)
-        else:
-            return float(mean)
-
-    # Median
-    elif summaryType == "median":
-        if len(info)==0:
-            return None
-        median = info['value'].median(axis=0)
-        if type(median) == type(np.int64(0)):
-            return int(median)
-        else:
-            return float(median)
-
-    # Standard Deviation
-    elif summaryType == "stdev":
-        if len(info)==0:
-            return None
-        if len(baseInfo) > 2:
-            std = info['value'].std(axis=0)
-            if type(std) == type(np.int64(0)):
-                return int(std)
-            else:
-                return float(std)
-        else:
-            return None
-
-    # Maximum
-    elif summaryType == "max":
-        if len(info)==0:
-            return None
-        maxVal = info['value'].max(axis=0)
-        if type(maxVal) == type(np.int64(0)):
-            return int(maxVal)
-        else:
-            return float(maxVal)
-
-    # Minimum
-    elif summaryType == "min":
-        if len(info)==0:
-            return None
-        minVal = info['value'].min(axis=0)
-        if type(minVal) == type(np.int64(0)):
-            return int(minVal)
-        else:
-            return float(minVal)
+    # Mean, median, standard deviation, maximum and minimum
+    elif summaryType in _ARRAY_SUMMARIES:
+        return _summarize_array(baseInfo, summaryType)
 
     # No summary, just the full dataframe
     elif summaryType == '' or summaryType is None:
-        if len(info)==0:
-            return None
-        val = info.T.to_json()
+        val = info.to_json(orient='index')
         return val
     else:
         raise AWE_Workbench_Error('Invalid summary function '
@@ -3377,87 +4028,105 @@ def AWE_Info(document: Doc,
         obtaining information about indicators annoted on
         the AWE Workbench Spacy parse tree. 
     '''
-    try:
-        baseInfo = []
-        # security check
-        if not re.match('[A-Za-z0-9_]+', indicator):
-            raise AWE_Workbench_Error(
-                'Invalid indicator ' + indicator)                   
-
-        if infoType == 'Doc':
-            baseInfo = createSpanInfo(indicator,
-                                      document)
-            newInfo = []
-            filterEntry = False
-            if baseInfo is not None:
-                for entry in baseInfo:
-                    if type(filters) == list and len(filters)>0:
-                        filterEntry = applySpanFilters(document[entry['startToken']],
-                                                                entry,
-                                                                filters)
-                    elif filters != []:
-                        raise AWE_Workbench_Error('Invalid filter '
-                            + str(filters))                   
-                    if filterEntry:
-                        continue
-                    newInfo.append(entry)
-                baseInfo = applySpanTransformations(transformations,
-                                                newInfo)
-        elif infoType == 'Token' \
-           and indicator in summary_functions:
-            baseInfo = getattr(document._, indicator)
-            newInfo = []
-            filterEntry = False
-            if baseInfo is not None:
-                for entry in baseInfo:
-                    if type(filters) == list and len(filters)>0:
-                        filterEntry = applyTokenFilters(document[entry['tokenIdx']],
-                                                        entry,
-                                                        filters)
-                    elif filters != []:
-                        raise AWE_Workbench_Error('Invalid filter '
-                            + str(filters))                   
-                    if filterEntry:
-                        continue
-                    entry = \
-                        applyTokenTransformations(entry,
-                                                  document[entry['tokenIdx']],
-                                                  transformations)
-                    newInfo.append(entry)
-                baseInfo = newInfo
-
-        elif infoType == 'Token':
-            for token in document:
-                entry = setTokenEntry(indicator, token, None)
-
-                filterEntry = False
+    baseInfo = []
+    # security check (delimiter spans name their delimiter,
+    # which can be any text, after the prefix)
+    if not _RE_NAME.match(indicator) \
+       and not indicator.startswith('delimiter_'):
+        raise AWE_Workbench_Error(
+            'Invalid indicator ' + indicator)                   
+
+    if infoType == 'Doc':
+        baseInfo = createSpanInfo(indicator,
+                                  document)
+        newInfo = []
+        filterEntry = False
+        if baseInfo is not None:
+            for entry in baseInfo:
                 if type(filters) == list and len(filters)>0:
-                    filterEntry = applyTokenFilters(token,
-                                                    entry,
-                                                    filters)
+                    filterEntry = applySpanFilters(document[entry['startToken']],
+                                                            entry,
+                                                            filters)
                 elif filters != []:
                     raise AWE_Workbench_Error('Invalid filter '
                         + str(filters))                   
                 if filterEntry:
                     continue
-                else:
-                    entry = \
-                        applyTokenTransformations(entry,
-                                                  token,
-                                                  transformations)
-                    baseInfo.append(entry)
-        else:
-            raise AWE_Workbench_Error('Invalid indicator type '
-                + infoType)                   
+                newInfo.append(entry)
+            baseInfo = applySpanTransformations(transformations,
+                                            newInfo)
+    elif infoType == 'Token' \
+       and indicator in summary_functions:
+        baseInfo = getattr(document._, indicator)
+        if baseInfo is None:
+            baseInfo = []
+        if len(baseInfo) > 0 \
+           and type(filters) != list and filters != []:
+            raise AWE_Workbench_Error('Invalid filter '
+                + str(filters))
+        _check_transformations(transformations)
+        useFilters = type(filters) == list and len(filters) > 0
+        # filter, transform and collect each entry in one pass
+        baseInfo = [_transform_token_entry(entry,
+                                           document[entry['tokenIdx']],
+                                           transformations)
+                    for entry in baseInfo
+                    if not (useFilters
+                            and applyTokenFilters(
+                                document[entry['tokenIdx']],
+                                entry,
+                                filters))]
+
+    elif infoType == 'Token' \
+       and summaryType in _ARRAY_SUMMARIES \
+       and filters == [] and not transformations:
+        # The summary only needs the values, so we don't build
+        # token entries at all
+        values = []
+        if len(document) > 0:
+            values = list(map(_indicator_getter(indicator), document))
+        return _summarize_values(values, summaryType)
+
+    elif infoType == 'Token':
+        # Read the indicator off all the tokens in one pass, and
+        # only build entries for the tokens that pass the filters
+        values = []
+        if len(document) > 0:
+            values = list(map(_indicator_getter(indicator), document))
+            if type(filters) != list and filters != []:
+                raise AWE_Workbench_Error('Invalid filter '
+                    + str(filters))
+        _check_transformations(transformations)
+        useFilters = type(filters) == list and len(filters) > 0
+        baseInfo = [_transform_token_entry(
+                        newTokenEntry(indicator, token, value),
+                        token,
+                        transformations)
+                    for token, value in zip(document, values)
+                    if not (useFilters
+                            and _filter_token_value(token,
+                                                    value,
+                                                    filters))]
+    else:
+        raise AWE_Workbench_Error('Invalid indicator type '
+            + infoType)                   
+    if summaryType in _ARRAY_SUMMARIES:
+        return _summarize_array(baseInfo, summaryType)
+    # pandas is only needed to summarize AWE_Info results, so
+    # we defer the (slow) import until it is actually used
+    import pandas as pd
+    if summaryType == '' or summaryType is None:
         info = pd.DataFrame.from_dict(baseInfo)
-        return applySummaryFunction(info,
-                                    baseInfo,
-                                    summaryType,
-                                    document)
-
-    except Exception as e:
-            print(e)
-            raise AWE_Workbench_Error('error in code')
+    else:
+        # Summaries only look at the values, so we skip building
+        # the full record table and keep a single value column
+        info = pd.DataFrame(
+            {'value': [entry.get('value') for entry in baseInfo]})
+    return applySummaryFunction(info,
+                                baseInfo,
+                                summaryType,
+                                document)
+
             
 def setExtensionFunctions(method_extensions, docspan_extensions, token_extensions):
     for extension in method_extensions:
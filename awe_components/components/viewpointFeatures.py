@@ -4089,7 +4089,7 @@ class ViewpointFeatureDef:
                     # Imperatives
                     if isRoot(token) \
                        and token.head.lemma_ == token.head.lower_ \
-                       and not all(['Tense=' in str(child.morph)
+                       and not all([len(child.morph.get('Tense')) > 0
                                     for child in token.head.children]):
                         if domHead not in \
                            propositional_attitudes['explicit_2']:
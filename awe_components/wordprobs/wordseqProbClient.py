@@ -4,37 +4,69 @@
 import asyncio
 import websockets
 import json
+import threading
 from websocket import create_connection
 
 
 class WordseqProbClient:
 
     uri = None
+    ws = None
 
     def __init__(self):
         self.uri = "ws://localhost:8775"
+        self.ws = None
+        # One client (and so one connection) is shared by every
+        # caller in the process, so requests take turns on it
+        self._lock = threading.RLock()
 
     def set_uri(self, uri):
-        self.uri = uri
+        with self._lock:
+            self.close()
+            self.uri = uri
+
+    def close(self):
+        if self.ws is not None:
+            try:
+                self.ws.close()
+            except Exception:
+                pass
+        self.ws = None
+
+    def _roundtrip(self, payload):
+        # The connection is kept open between requests. If it has
+        # gone stale (e.g., the server was restarted) we reconnect
+        # once before giving up.
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self.ws is None:
+                        self.ws = create_connection(self.uri,
+                                                    timeout=None)
+                    self.ws.send(json.dumps(payload))
+                    return json.loads(self.ws.recv())
+                except Exception as e:
+                    self.close()
+                    if attempt > 0:
+                        print(e)
+            return None
 
     def send(self, message: list):
         if message is None:
             print('no message!')
             return None
-        try:
-            ws = create_connection(self.uri, timeout=None)
-            ws.send(json.dumps(message))
-            result = ws.recv()
-            ws.close()
-            ws.on_message = None
-            ws.on_open = None
-            ws.close = None
-            del ws
-            ws = None
-            return json.loads(result)
-        except Exception as e:
-            print(e)
+        return self._roundtrip(message)
+
+    def send_batch(self, messages: list):
+        """
+         Send several [word, left context, right context] queries in
+         one round trip. Returns a list with one result per query, in
+         the same form send() returns for a single query.
+        """
+        if messages is None or len(messages) == 0:
+            print('no message!')
             return None
+        return self._roundtrip(messages)
 
 
 if __name__ == '__main__':
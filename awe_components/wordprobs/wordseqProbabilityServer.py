@@ -36,6 +36,15 @@ class wordseqProbabilityServer:
         await websocket.close()
         exit()
 
+    def probability(self, query):
+        word = query[0]
+        context = ''.join(query[1]) \
+                  + ' [MASK] ' + \
+                  ''.join(query[2])
+
+        print(word, context)
+        return self.wpic.probabilityInContext(word, context)
+
     async def run_wordseqprobs(self, websocket, path):
         async for message in websocket:
 
@@ -44,15 +53,16 @@ class wordseqProbabilityServer:
             print(len(messagelist))
             if messagelist == ['kill()']:
                 await self.kill(websocket)
+            elif len(messagelist) > 0 \
+                and all([isinstance(query, list) and len(query) == 3
+                         for query in messagelist]):
+                # a batch of queries answered in one round trip
+                print('processing batch')
+                await websocket.send(json.dumps(
+                    [[self.probability(query)] for query in messagelist]))
             elif len(messagelist) == 3:
                 print('processing')
-                word = messagelist[0]
-                context = ''.join(messagelist[1]) \
-                          + ' [MASK] ' + \
-                          ''.join(messagelist[2])
-
-                print(word, context)
-                probability = self.wpic.probabilityInContext(word, context)
+                probability = self.probability(messagelist)
                 await websocket.send(json.dumps([probability]))
             else:
                 print('error')